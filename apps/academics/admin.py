@@ -3,9 +3,13 @@ from .models import (
     Assessment,
     SubjectAssessment,
     Score,
+    ScoreApprovalEvent,
     SubjectScore,
     ReportCard,
     ClassPerformance,
+    SubjectPerformance,
+    ResultsJob,
+    ResultsJobClass,
 )
 
 
@@ -38,11 +42,29 @@ class ScoreAdmin(admin.ModelAdmin):
         'subject_assessment',
         'score',
         'recorded_by',
-        'is_approved')
-    list_filter = ('is_approved',)
+        'status')
+    list_filter = ('status',)
     search_fields = ('student__admission_number',)
 
 
+@admin.register(ScoreApprovalEvent)
+class ScoreApprovalEventAdmin(admin.ModelAdmin):
+    list_display = (
+        'score',
+        'action',
+        'previous_status',
+        'score_value',
+        'actor',
+        'created_at')
+    list_filter = ('action',)
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(SubjectScore)
 class SubjectScoreAdmin(admin.ModelAdmin):
     list_display = (
@@ -67,3 +89,42 @@ class ReportCardAdmin(admin.ModelAdmin):
 @admin.register(ClassPerformance)
 class ClassPerformanceAdmin(admin.ModelAdmin):
     list_display = ('class_assigned', 'term', 'academic_year', 'class_average')
+
+
+@admin.register(SubjectPerformance)
+class SubjectPerformanceAdmin(admin.ModelAdmin):
+    list_display = (
+        'class_assigned',
+        'subject',
+        'term',
+        'academic_year',
+        'student_count',
+        'mean_score',
+        'pass_rate')
+    list_filter = ('term', 'academic_year')
+
+
+class ResultsJobClassInline(admin.TabularInline):
+    model = ResultsJobClass
+    extra = 0
+    readonly_fields = (
+        'class_assigned',
+        'status',
+        'report_cards',
+        'duration',
+        'error',
+        'started_at',
+        'completed_at')
+
+
+@admin.register(ResultsJob)
+class ResultsJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'term',
+        'academic_year',
+        'status',
+        'started_by',
+        'started_at',
+        'completed_at')
+    list_filter = ('status', 'term')
+    inlines = [ResultsJobClassInline]
@@ -258,9 +258,9 @@ class ScoreAdminListView(ListView):
         # Filter by approval status
         approved = self.request.GET.get('approved')
         if approved == 'true':
-            queryset = queryset.filter(is_approved=True)
+            queryset = queryset.filter(status=Score.ApprovalStatus.APPROVED)
         elif approved == 'false':
-            queryset = queryset.filter(is_approved=False)
+            queryset = queryset.exclude(status=Score.ApprovalStatus.APPROVED)
         
         return queryset.order_by('-recorded_at')
     
@@ -0,0 +1,242 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+
+from .models import SubjectPerformance, SubjectScore
+
+
+# Subject total needed to pass, matching ReportCard.is_promoted
+PASS_MARK = 50
+BUCKET_WIDTH = 10
+
+PERFORMANCE_KEY = ['class_assigned', 'subject', 'term', 'academic_year']
+PERFORMANCE_UPDATE_FIELDS = [
+    'student_count', 'score_sum', 'mean_score', 'min_score', 'max_score',
+    'pass_count', 'pass_rate', 'distribution', 'updated_at',
+]
+
+# Dimensions the query API can group by: name -> (id field, label field)
+DIMENSIONS = {
+    'class': ('class_assigned_id', 'class_assigned__name'),
+    'subject': ('subject_id', 'subject__name'),
+    'term': ('term', 'term'),
+    'academic_year': ('academic_year_id', 'academic_year__name'),
+    'class_level': ('class_assigned__class_level_id', 'class_assigned__class_level__name'),
+}
+
+
+def bucket_bounds():
+    """(label, lower, upper) for every distribution bucket; the last one is closed"""
+    bounds = []
+    for lower in range(0, 100, BUCKET_WIDTH):
+        upper = lower + BUCKET_WIDTH
+        if upper < 100:
+            bounds.append((f"{lower}-{upper - 1}", lower, upper))
+        else:
+            bounds.append((f"{lower}-100", lower, None))
+    return bounds
+
+
+def bucket_aggregates():
+    """Conditional counts of SubjectScore totals per distribution bucket"""
+    aggregates = {}
+    for label, lower, upper in bucket_bounds():
+        condition = Q(total_score__gte=lower)
+        if upper is not None:
+            condition &= Q(total_score__lt=upper)
+        aggregates[f'bucket_{lower}'] = Count('id', filter=condition)
+    return aggregates
+
+
+def aggregate_subject_performance(subject_scores):
+    """Group a SubjectScore queryset into one statistics row per cube cell"""
+    return subject_scores.filter(
+        total_score__isnull=False
+    ).values(
+        'class_assigned_id', 'subject_id', 'term', 'academic_year_id'
+    ).annotate(
+        student_count=Count('id'),
+        total=Sum('total_score'),
+        minimum=Min('total_score'),
+        maximum=Max('total_score'),
+        pass_count=Count('id', filter=Q(total_score__gte=PASS_MARK)),
+        **bucket_aggregates(),
+    ).order_by()
+
+
+def to_decimal(value):
+    return round(Decimal(str(value)), 2)
+
+
+def build_subject_performance(row):
+    """Build an unsaved SubjectPerformance from an aggregate row"""
+    return SubjectPerformance(
+        class_assigned_id=row['class_assigned_id'],
+        subject_id=row['subject_id'],
+        term=row['term'],
+        academic_year_id=row['academic_year_id'],
+        student_count=row['student_count'],
+        score_sum=to_decimal(row['total']),
+        mean_score=to_decimal(row['total'] / row['student_count']),
+        min_score=to_decimal(row['minimum']),
+        max_score=to_decimal(row['maximum']),
+        pass_count=row['pass_count'],
+        pass_rate=to_decimal(row['pass_count'] * 100 / row['student_count']),
+        distribution={
+            label: row[f'bucket_{lower}'] for label, lower, _ in bucket_bounds()
+        },
+    )
+
+
+def cell_filter(cells):
+    """Q matching the given (class_id, subject_id, term, academic_year_id) cells"""
+    groups = defaultdict(set)
+    for class_id, subject_id, term, academic_year_id in cells:
+        groups[(subject_id, term, academic_year_id)].add(class_id)
+
+    condition = Q()
+    for (subject_id, term, academic_year_id), class_ids in groups.items():
+        condition |= Q(
+            class_assigned_id__in=class_ids,
+            subject_id=subject_id,
+            term=term,
+            academic_year_id=academic_year_id,
+        )
+    return condition
+
+
+def cell_key(obj):
+    return (obj.class_assigned_id, obj.subject_id, obj.term, obj.academic_year_id)
+
+
+def write_subject_performance(rows, stale, batch_size=None):
+    """Upsert computed cube rows and delete the cells in ``stale``"""
+    with transaction.atomic():
+        SubjectPerformance.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=PERFORMANCE_KEY,
+            update_fields=PERFORMANCE_UPDATE_FIELDS,
+        )
+        if stale:
+            SubjectPerformance.objects.filter(stale).delete()
+
+
+def refresh_subject_performance(cells):
+    """
+    Recalculate the analytics cube for the given cells.
+
+    ``cells`` is an iterable of (class_id, subject_id, term,
+    academic_year_id) tuples. All cells are aggregated from SubjectScore in
+    one grouped query and written with one bulk upsert; cells left without
+    any scores are removed.
+    """
+    cells = set(cells)
+    if not cells:
+        return 0
+
+    rows = [
+        build_subject_performance(row)
+        for row in aggregate_subject_performance(
+            SubjectScore.objects.filter(cell_filter(cells)))
+    ]
+    stale = cells - {cell_key(row) for row in rows}
+    write_subject_performance(rows, cell_filter(stale) if stale else None)
+    return len(rows)
+
+
+def rebuild_subject_performance(academic_year=None, term=None, batch_size=1000):
+    """Rebuild the analytics cube from SubjectScore"""
+    subject_scores = SubjectScore.objects.all()
+    performances = SubjectPerformance.objects.all()
+    if academic_year is not None:
+        subject_scores = subject_scores.filter(academic_year=academic_year)
+        performances = performances.filter(academic_year=academic_year)
+    if term is not None:
+        subject_scores = subject_scores.filter(term=term)
+        performances = performances.filter(term=term)
+
+    rows = [
+        build_subject_performance(row)
+        for row in aggregate_subject_performance(subject_scores)
+    ]
+    found = {cell_key(row) for row in rows}
+    stale_ids = [
+        pk for pk, *key in performances.values_list(
+            'id', 'class_assigned_id', 'subject_id', 'term', 'academic_year_id')
+        if tuple(key) not in found
+    ]
+    write_subject_performance(
+        rows, Q(id__in=stale_ids) if stale_ids else None, batch_size=batch_size)
+    return len(rows)
+
+
+def performance_summary(group_by=('class', 'subject'), academic_year=None,
+                        term=None, class_assigned=None, subject=None,
+                        class_level=None):
+    """
+    Roll the analytics cube up along ``group_by`` dimensions.
+
+    Dimensions are keys of ``DIMENSIONS``. Means and pass rates are
+    weighted by student count and distributions are summed, so any
+    combination of classes, subjects, terms and years is answered from the
+    pre-aggregated rows without touching Score.
+    """
+    unknown = set(group_by) - set(DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown dimensions: {', '.join(sorted(unknown))}")
+
+    performances = SubjectPerformance.objects.all()
+    if academic_year is not None:
+        performances = performances.filter(academic_year=academic_year)
+    if term is not None:
+        performances = performances.filter(term=term)
+    if class_assigned is not None:
+        performances = performances.filter(class_assigned=class_assigned)
+    if subject is not None:
+        performances = performances.filter(subject=subject)
+    if class_level is not None:
+        performances = performances.filter(class_assigned__class_level=class_level)
+
+    fields = [field for dimension in group_by for field in DIMENSIONS[dimension]]
+    groups = {}
+    for row in performances.values(
+        *dict.fromkeys(fields), 'student_count', 'score_sum', 'min_score',
+        'max_score', 'pass_count', 'distribution'
+    ):
+        key = tuple(row[DIMENSIONS[dimension][0]] for dimension in group_by)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {
+                dimension: {'id': row[DIMENSIONS[dimension][0]],
+                            'name': row[DIMENSIONS[dimension][1]]}
+                for dimension in group_by
+            }
+            group.update(student_count=0, score_sum=Decimal('0'), pass_count=0,
+                         min_score=row['min_score'], max_score=row['max_score'],
+                         distribution=defaultdict(int))
+        group['student_count'] += row['student_count']
+        group['score_sum'] += row['score_sum']
+        group['pass_count'] += row['pass_count']
+        group['min_score'] = min(group['min_score'], row['min_score'])
+        group['max_score'] = max(group['max_score'], row['max_score'])
+        for label, count in row['distribution'].items():
+            group['distribution'][label] += count
+
+    results = []
+    for group in groups.values():
+        count = group.pop('student_count')
+        score_sum = group.pop('score_sum')
+        group.update(
+            student_count=count,
+            mean_score=float(round(score_sum / count, 2)),
+            min_score=float(group['min_score']),
+            max_score=float(group['max_score']),
+            pass_rate=round(group['pass_count'] * 100 / count, 2),
+            distribution=dict(group['distribution']),
+        )
+        results.append(group)
+    return results
@@ -0,0 +1,93 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Score, ScoreApprovalEvent
+
+
+def apply_score_approval(scores, action, actor, notes='', batch_size=2000):
+    """
+    Approve or reject a selection of scores and record the decisions.
+
+    ``scores`` is a Score queryset (any filter) or an iterable of score
+    ids; ``action`` is ``Score.ApprovalStatus.APPROVED`` or ``REJECTED``.
+    Scores already in that state are left alone. The selected rows are
+    locked, moved to the new state with one UPDATE per batch and an audit
+    event per changed score is appended in the same transaction.
+
+    Returns the number of scores whose state changed.
+    """
+    if action not in (Score.ApprovalStatus.APPROVED, Score.ApprovalStatus.REJECTED):
+        raise ValueError(f"Unsupported approval action: {action}")
+
+    if hasattr(scores, 'values_list'):
+        selections = [scores]
+    else:
+        ids = list(scores)
+        selections = [
+            Score.objects.filter(id__in=ids[start:start + batch_size])
+            for start in range(0, len(ids), batch_size)
+        ]
+
+    approved = action == Score.ApprovalStatus.APPROVED
+    now = timezone.now()
+    changed = 0
+    with transaction.atomic():
+        rows = []
+        for selection in selections:
+            rows.extend(selection.select_for_update(of=('self',)).exclude(
+                status=action
+            ).order_by('id').values_list('id', 'status', 'score'))
+
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            Score.objects.filter(id__in=[row[0] for row in batch]).update(
+                status=action,
+                approved_by=actor if approved else None,
+                approved_at=now if approved else None,
+            )
+            ScoreApprovalEvent.objects.bulk_create([
+                ScoreApprovalEvent(
+                    score_id=score_id,
+                    action=action,
+                    previous_status=previous_status,
+                    score_value=score,
+                    notes=notes,
+                    actor=actor,
+                )
+                for score_id, previous_status, score in batch
+            ])
+            changed += len(batch)
+
+    return changed
+
+
+def reset_edited_approvals(scores, existing, actor):
+    """
+    Send edited scores back for review before they are upserted.
+
+    ``scores`` maps (student_id, subject_assessment_id) to the unsaved
+    Score about to be written and ``existing`` maps the same keys to the
+    stored rows, loaded with their approval fields. A score whose value is
+    unchanged keeps its approval; an approved or rejected score whose
+    value changed is left pending and the reset is recorded as an event.
+    """
+    events = []
+    for key, score in scores.items():
+        current = existing.get(key)
+        if current is None:
+            continue
+        if current.score == score.score:
+            score.status = current.status
+            score.approved_by_id = current.approved_by_id
+            score.approved_at = current.approved_at
+        elif current.status != Score.ApprovalStatus.PENDING:
+            events.append(ScoreApprovalEvent(
+                score_id=current.id,
+                action=Score.ApprovalStatus.PENDING,
+                previous_status=current.status,
+                score_value=score.score,
+                notes="Score edited",
+                actor=actor,
+            ))
+    ScoreApprovalEvent.objects.bulk_create(events)
+    return len(events)
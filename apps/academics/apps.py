@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class AcademicsConfig(AppConfig):
+    name = 'apps.academics'
+
+    def ready(self):
+        from . import signals  # noqa: F401
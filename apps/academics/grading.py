@@ -0,0 +1,61 @@
+from bisect import bisect_right
+from functools import lru_cache
+
+
+# School-wide scale used when an assessment defines no grade boundaries
+DEFAULT_GRADE_BOUNDARIES = {'A': 70, 'B': 60, 'C': 50, 'D': 45, 'E': 40}
+
+# Grade for a percentage below the lowest boundary of a scale
+FAIL_GRADE = 'F'
+
+
+class GradeScale:
+    """
+    Grade boundaries compiled into a sorted lookup table.
+
+    Thresholds are kept in ascending order next to their grades, so a
+    percentage is graded with one binary search instead of sorting the
+    boundaries on every lookup.
+    """
+
+    def __init__(self, boundaries):
+        bands = sorted(
+            (float(min_score), grade) for grade, min_score in boundaries.items()
+        )
+        self.thresholds = [min_score for min_score, _ in bands]
+        self.grades = [FAIL_GRADE] + [grade for _, grade in bands]
+
+    def grade(self, percentage):
+        """Grade a single percentage"""
+        return self.grades[bisect_right(self.thresholds, float(percentage))]
+
+    def grade_many(self, percentages):
+        """Grade a sequence of percentages, returning grades in the same order"""
+        thresholds = self.thresholds
+        grades = self.grades
+        return [grades[bisect_right(thresholds, float(p))] for p in percentages]
+
+
+@lru_cache(maxsize=256)
+def _compile_scale(bands):
+    return GradeScale(dict(bands))
+
+
+def get_grade_scale(boundaries=None):
+    """
+    Compiled scale for an assessment's ``grade_boundaries``.
+
+    Empty boundaries use the school-wide default scale. Scales are cached
+    by their boundaries, so every assessment sharing a scale shares one
+    lookup table.
+    """
+    boundaries = boundaries or DEFAULT_GRADE_BOUNDARIES
+    return _compile_scale(tuple(sorted(
+        (grade, float(min_score)) for grade, min_score in boundaries.items()
+    )))
+
+
+def calculate_grade(percentage, boundaries=None):
+    """Calculate grade for a percentage on the given (or default) scale"""
+    return get_grade_scale(boundaries).grade(percentage)
+
@@ -0,0 +1,71 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.academics.models import ResultsJob
+from apps.academics.results_jobs import run_results_job, start_results_job
+from apps.accounts.models import User
+from apps.school.models import AcademicYear, SchoolProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute report cards and class performance for every active class. "
+        "Progress is recorded per class, so an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term', required=True, choices=SchoolProfile.TermChoices.values,
+            help="Term to compute results for")
+        parser.add_argument(
+            '--academic-year', type=int,
+            help="Academic year (id); defaults to the current academic year")
+        parser.add_argument(
+            '--generated-by',
+            help="Username recorded on the report cards; defaults to the first superuser")
+        parser.add_argument(
+            '--workers', type=int,
+            help="Number of worker processes (defaults to the CPU count; 1 runs inline)")
+        parser.add_argument(
+            '--restart', action='store_true',
+            help="Recompute every class, including those already completed")
+
+    def handle(self, *args, **options):
+        if options['academic_year']:
+            academic_year = AcademicYear.objects.filter(pk=options['academic_year']).first()
+        else:
+            academic_year = AcademicYear.objects.filter(is_current=True).first()
+        if academic_year is None:
+            raise CommandError("Academic year not found.")
+
+        if options['generated_by']:
+            user = User.objects.filter(username=options['generated_by']).first()
+        else:
+            user = User.objects.filter(is_superuser=True, is_active=True).order_by('id').first()
+        if user is None:
+            raise CommandError("No user to record as the generator of the report cards.")
+
+        job = start_results_job(options['term'], academic_year, user, restart=options['restart'])
+        tasks = list(job.classes.select_related('class_assigned'))
+        names = {task.id: task.class_assigned.name for task in tasks}
+        done = sum(task.status == ResultsJob.Status.COMPLETED for task in tasks)
+        if done:
+            self.stdout.write(f"Resuming: {done} of {len(names)} classes already completed.")
+
+        def report(result):
+            task_id, status, count, duration, error = result
+            if error:
+                self.stderr.write(f"{names[task_id]}: failed after {duration:.2f}s - {error}")
+            else:
+                self.stdout.write(f"{names[task_id]}: {count} report cards in {duration:.2f}s")
+
+        start = time.perf_counter()
+        failed = run_results_job(job, max_workers=options['workers'], callback=report)
+        elapsed = time.perf_counter() - start
+
+        if failed:
+            raise CommandError(
+                f"{failed} classes failed after {elapsed:.2f}s; run the command again to retry them.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Results for {job.term} {academic_year} completed in {elapsed:.2f}s."))
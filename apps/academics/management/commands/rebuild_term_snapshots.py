@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.academics.timeline import rebuild_term_snapshots
+from apps.school.models import AcademicYear, SchoolProfile
+
+
+class Command(BaseCommand):
+    help = "Rebuild student performance timeline snapshots from report cards"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--academic-year', type=int,
+            help="Only rebuild this academic year (id)")
+        parser.add_argument(
+            '--term', choices=SchoolProfile.TermChoices.values,
+            help="Only rebuild this term")
+
+    def handle(self, *args, **options):
+        academic_year = None
+        if options['academic_year']:
+            try:
+                academic_year = AcademicYear.objects.get(pk=options['academic_year'])
+            except AcademicYear.DoesNotExist:
+                raise CommandError(f"Academic year {options['academic_year']} does not exist.")
+
+        count = rebuild_term_snapshots(academic_year=academic_year, term=options['term'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} term snapshots."))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from apps.academics.models import ReportCard
+from apps.academics.pdf import render_report_cards
+from apps.school.models import SchoolProfile
+
+
+class Command(BaseCommand):
+    help = "Pre-render approved report card PDFs whose stored copy is missing or stale"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--class', dest='class_id', type=int,
+            help="Only render report cards for this class (id)")
+        parser.add_argument(
+            '--academic-year', type=int,
+            help="Only render report cards for this academic year (id)")
+        parser.add_argument(
+            '--term', choices=SchoolProfile.TermChoices.values,
+            help="Only render report cards for this term")
+        parser.add_argument(
+            '--workers', type=int,
+            help="Number of renderer processes (defaults to the CPU count)")
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Re-render even when the stored PDF is current")
+
+    def handle(self, *args, **options):
+        report_cards = ReportCard.objects.filter(is_approved=True)
+        if options['class_id']:
+            report_cards = report_cards.filter(class_assigned_id=options['class_id'])
+        if options['academic_year']:
+            report_cards = report_cards.filter(academic_year_id=options['academic_year'])
+        if options['term']:
+            report_cards = report_cards.filter(term=options['term'])
+
+        count = render_report_cards(
+            report_cards,
+            max_workers=options['workers'],
+            force=options['force']
+        )
+        self.stdout.write(self.style.SUCCESS(f"Rendered {count} report card PDFs."))
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reportcard",
+            name="pdf_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
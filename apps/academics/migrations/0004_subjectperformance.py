@@ -0,0 +1,77 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0001_initial"),
+        ("classes", "0001_initial"),
+        ("academics", "0003_results_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SubjectPerformance",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "term",
+                    models.CharField(
+                        choices=[
+                            ("FIRST", "First Term"),
+                            ("SECOND", "Second Term"),
+                            ("THIRD", "Third Term"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("student_count", models.PositiveIntegerField(default=0)),
+                ("score_sum", models.DecimalField(decimal_places=2, max_digits=9)),
+                ("mean_score", models.DecimalField(decimal_places=2, max_digits=5)),
+                ("min_score", models.DecimalField(decimal_places=2, max_digits=5)),
+                ("max_score", models.DecimalField(decimal_places=2, max_digits=5)),
+                ("pass_count", models.PositiveIntegerField(default=0)),
+                ("pass_rate", models.DecimalField(decimal_places=2, max_digits=5)),
+                ("distribution", models.JSONField(default=dict)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "academic_year",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="school.academicyear",
+                    ),
+                ),
+                (
+                    "class_assigned",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="subject_performances",
+                        to="classes.class",
+                    ),
+                ),
+                (
+                    "subject",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="classes.subject",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {
+                    ("class_assigned", "subject", "term", "academic_year")
+                },
+            },
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:47
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_status(apps, schema_editor):
+    Score = apps.get_model("academics", "Score")
+    Score.objects.filter(is_approved=True).update(status="APPROVED")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("academics", "0004_subjectperformance"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="score",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("APPROVED", "Approved"),
+                    ("REJECTED", "Rejected"),
+                ],
+                default="PENDING",
+                max_length=10,
+            ),
+        ),
+        migrations.RunPython(backfill_status, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name="ScoreApprovalEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("APPROVED", "Approved"),
+                            ("REJECTED", "Rejected"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "previous_status",
+                    models.CharField(
+                        choices=[
+                            ("PENDING", "Pending"),
+                            ("APPROVED", "Approved"),
+                            ("REJECTED", "Rejected"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("score_value", models.DecimalField(decimal_places=2, max_digits=5)),
+                ("notes", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="score_approval_events",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "score",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="approval_events",
+                        to="academics.score",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["score", "created_at"],
+                        name="academics_s_score_i_b2fdd9_idx",
+                    )
+                ],
+            },
+        ),
+    ]
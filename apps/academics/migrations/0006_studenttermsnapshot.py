@@ -0,0 +1,90 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0001_initial"),
+        ("classes", "0001_initial"),
+        ("students", "0001_initial"),
+        ("academics", "0005_score_approval"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StudentTermSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "term",
+                    models.CharField(
+                        choices=[
+                            ("FIRST", "First Term"),
+                            ("SECOND", "Second Term"),
+                            ("THIRD", "Third Term"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "total_score",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=6, null=True
+                    ),
+                ),
+                (
+                    "average_score",
+                    models.DecimalField(
+                        blank=True, decimal_places=2, max_digits=5, null=True
+                    ),
+                ),
+                ("position", models.PositiveIntegerField(blank=True, null=True)),
+                ("total_students", models.PositiveIntegerField(default=0)),
+                ("subject_count", models.PositiveIntegerField(default=0)),
+                ("grade_distribution", models.JSONField(default=dict)),
+                ("total_school_days", models.PositiveIntegerField(default=0)),
+                ("days_present", models.PositiveIntegerField(default=0)),
+                (
+                    "attendance_percentage",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=5),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "academic_year",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="school.academicyear",
+                    ),
+                ),
+                (
+                    "class_assigned",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT, to="classes.class"
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="term_snapshots",
+                        to="students.student",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["student", "academic_year__start_date", "term"],
+                "unique_together": {("student", "academic_year", "term")},
+            },
+        ),
+    ]
@@ -0,0 +1,154 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:18
+
+from bisect import bisect_right
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, F, FloatField, Max, Min, Q, Sum
+from django.db.models.functions import Cast
+
+# Frozen copies of the default grade scale and the cube's pass mark and
+# buckets, so the backfill does not change when the application does
+GRADE_BOUNDARIES = [(40, "E"), (45, "D"), (50, "C"), (60, "B"), (70, "A")]
+PASS_MARK = 50
+BUCKET_WIDTH = 10
+
+
+def grade(total):
+    thresholds = [min_score for min_score, _ in GRADE_BOUNDARIES]
+    grades = ["F"] + [grade for _, grade in GRADE_BOUNDARIES]
+    return grades[bisect_right(thresholds, float(total))]
+
+
+def to_decimal(value):
+    return round(Decimal(str(value)), 2)
+
+
+def backfill_subject_scores(apps, schema_editor):
+    # Report cards and class performance read totals from SubjectScore only,
+    # so build it from the scores recorded before it was kept current
+    Score = apps.get_model("academics", "Score")
+    SubjectScore = apps.get_model("academics", "SubjectScore")
+    StudentHistory = apps.get_model("students", "StudentHistory")
+
+    rows = list(
+        Score.objects.filter(subject_assessment__max_score__gt=0)
+        .values(
+            "student_id",
+            "student__current_class_id",
+            "student__current_class__academic_year_id",
+            subject_id=F("subject_assessment__subject_id"),
+            term=F("subject_assessment__term"),
+            academic_year_id=F("subject_assessment__academic_year_id"),
+        )
+        .annotate(
+            total=Sum(
+                Cast("score", FloatField())
+                / Cast("subject_assessment__max_score", FloatField())
+                * Cast(
+                    "subject_assessment__assessment__weight_percentage",
+                    FloatField(),
+                )
+            )
+        )
+        .order_by()
+    )
+
+    # Scores of a past year belong to the class the student had that year
+    classes = {}
+    for student_id, academic_year_id, class_id in StudentHistory.objects.order_by(
+        "date_from"
+    ).values_list("student_id", "academic_year_id", "class_assigned_id"):
+        classes[(student_id, academic_year_id)] = class_id
+
+    subject_scores = []
+    for row in rows:
+        class_id = row["student__current_class_id"]
+        if row["student__current_class__academic_year_id"] != row["academic_year_id"]:
+            class_id = classes.get(
+                (row["student_id"], row["academic_year_id"]), class_id
+            )
+        total = to_decimal(row["total"])
+        subject_scores.append(
+            SubjectScore(
+                student_id=row["student_id"],
+                subject_id=row["subject_id"],
+                term=row["term"],
+                academic_year_id=row["academic_year_id"],
+                class_assigned_id=class_id,
+                total_score=total,
+                grade=grade(total),
+            )
+        )
+    SubjectScore.objects.bulk_create(
+        subject_scores,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["student", "subject", "term", "academic_year"],
+        update_fields=["total_score", "grade"],
+    )
+
+    backfill_subject_performance(apps)
+
+
+def backfill_subject_performance(apps):
+    SubjectScore = apps.get_model("academics", "SubjectScore")
+    SubjectPerformance = apps.get_model("academics", "SubjectPerformance")
+
+    buckets = []
+    for lower in range(0, 100, BUCKET_WIDTH):
+        upper = lower + BUCKET_WIDTH
+        condition = Q(total_score__gte=lower)
+        if upper < 100:
+            label = f"{lower}-{upper - 1}"
+            condition &= Q(total_score__lt=upper)
+        else:
+            label = f"{lower}-100"
+        buckets.append((label, f"bucket_{lower}", Count("id", filter=condition)))
+
+    rows = (
+        SubjectScore.objects.filter(total_score__isnull=False)
+        .values("class_assigned_id", "subject_id", "term", "academic_year_id")
+        .annotate(
+            student_count=Count("id"),
+            total=Sum("total_score"),
+            minimum=Min("total_score"),
+            maximum=Max("total_score"),
+            pass_count=Count("id", filter=Q(total_score__gte=PASS_MARK)),
+            **{name: aggregate for _, name, aggregate in buckets},
+        )
+        .order_by()
+    )
+    SubjectPerformance.objects.all().delete()
+    SubjectPerformance.objects.bulk_create(
+        [
+            SubjectPerformance(
+                class_assigned_id=row["class_assigned_id"],
+                subject_id=row["subject_id"],
+                term=row["term"],
+                academic_year_id=row["academic_year_id"],
+                student_count=row["student_count"],
+                score_sum=to_decimal(row["total"]),
+                mean_score=to_decimal(row["total"] / row["student_count"]),
+                min_score=to_decimal(row["minimum"]),
+                max_score=to_decimal(row["maximum"]),
+                pass_count=row["pass_count"],
+                pass_rate=to_decimal(row["pass_count"] * 100 / row["student_count"]),
+                distribution={label: row[name] for label, name, _ in buckets},
+            )
+            for row in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academics", "0006_studenttermsnapshot"),
+        ("students", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_subject_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("academics", "0007_backfill_subject_scores"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="score",
+            name="is_approved",
+        ),
+    ]
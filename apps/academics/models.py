@@ -5,6 +5,8 @@ from apps.students.models import Student
 from apps.classes.models import Class, Subject, ClassLevel
 from apps.school.models import AcademicYear, SchoolProfile
 
+from .grading import calculate_grade
+
 
 class Assessment(models.Model):
     """Types of assessments (Test, Exam, etc.)"""
@@ -100,7 +102,15 @@ class Score(models.Model):
     last_updated = models.DateTimeField(auto_now=True)
 
     # For approval workflow
-    is_approved = models.BooleanField(default=False)
+    class ApprovalStatus(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        APPROVED = 'APPROVED', 'Approved'
+        REJECTED = 'REJECTED', 'Rejected'
+
+    status = models.CharField(
+        max_length=10,
+        choices=ApprovalStatus.choices,
+        default=ApprovalStatus.PENDING)
     approved_by = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -125,26 +135,52 @@ class Score(models.Model):
     @property
     def grade(self):
         """Calculate grade based on percentage"""
-        percentage = self.percentage
-        boundaries = self.subject_assessment.assessment.grade_boundaries
-
-        if boundaries:
-            for grade, min_score in sorted(
-                    boundaries.items(), key=lambda x: x[1], reverse=True):
-                if percentage >= min_score:
-                    return grade
-
-        # Default grading if no boundaries set
-        if percentage >= 70:
-            return 'A'
-        elif percentage >= 60:
-            return 'B'
-        elif percentage >= 50:
-            return 'C'
-        elif percentage >= 40:
-            return 'D'
-        else:
-            return 'F'
+        return calculate_grade(
+            self.percentage,
+            self.subject_assessment.assessment.grade_boundaries
+        )
+
+
+class ScoreApprovalEvent(models.Model):
+    """Append-only audit trail of score approval decisions"""
+    score = models.ForeignKey(
+        Score,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='approval_events')
+    action = models.CharField(
+        max_length=10,
+        choices=Score.ApprovalStatus.choices)
+    previous_status = models.CharField(
+        max_length=10,
+        choices=Score.ApprovalStatus.choices)
+    # Score value at the time of the decision
+    score_value = models.DecimalField(max_digits=5, decimal_places=2)
+    notes = models.TextField(blank=True)
+
+    # Metadata
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.PROTECT,
+        related_name='score_approval_events')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['score', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.score_id} {self.get_action_display()} by {self.actor}"
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            raise ValueError("Score approval events cannot be modified.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Score approval events cannot be deleted.")
 
 
 class SubjectScore(models.Model):
@@ -269,6 +305,8 @@ class ReportCard(models.Model):
 
     # PDF
     pdf_file = models.FileField(upload_to='reports/', null=True, blank=True)
+    # Content hash of the data the stored PDF was rendered from
+    pdf_hash = models.CharField(max_length=64, blank=True)
 
     class Meta:
         unique_together = ['student', 'term', 'academic_year']
@@ -285,6 +323,44 @@ class ReportCard(models.Model):
         return False
 
 
+class StudentTermSnapshot(models.Model):
+    """A student's results for one term, kept for the performance timeline"""
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='term_snapshots')
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE)
+    term = models.CharField(max_length=10,
+                            choices=SchoolProfile.TermChoices.choices)
+    class_assigned = models.ForeignKey(Class, on_delete=models.PROTECT)
+
+    # Results
+    total_score = models.DecimalField(
+        max_digits=6, decimal_places=2, null=True, blank=True)
+    average_score = models.DecimalField(
+        max_digits=5, decimal_places=2, null=True, blank=True)
+    position = models.PositiveIntegerField(null=True, blank=True)
+    total_students = models.PositiveIntegerField(default=0)
+    subject_count = models.PositiveIntegerField(default=0)
+    # {"A": 3, "B": 2, "F": 1}
+    grade_distribution = models.JSONField(default=dict)
+
+    # Attendance
+    total_school_days = models.PositiveIntegerField(default=0)
+    days_present = models.PositiveIntegerField(default=0)
+    attendance_percentage = models.DecimalField(
+        max_digits=5, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['student', 'academic_year', 'term']
+        ordering = ['student', 'academic_year__start_date', 'term']
+
+    def __str__(self):
+        return f"{self.student} - {self.term} {self.academic_year}"
+
+
 class ClassPerformance(models.Model):
     """Overall class performance for a term"""
     class_assigned = models.ForeignKey(
@@ -310,3 +386,96 @@ class ClassPerformance(models.Model):
 
     def __str__(self):
         return f"{self.class_assigned} - {self.term} {self.academic_year}"
+
+
+class SubjectPerformance(models.Model):
+    """Pre-aggregated subject results for a class in a term"""
+    class_assigned = models.ForeignKey(
+        Class,
+        on_delete=models.CASCADE,
+        related_name='subject_performances')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
+    term = models.CharField(max_length=10,
+                            choices=SchoolProfile.TermChoices.choices)
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE)
+
+    # Statistics over SubjectScore totals
+    student_count = models.PositiveIntegerField(default=0)
+    score_sum = models.DecimalField(max_digits=9, decimal_places=2)
+    mean_score = models.DecimalField(max_digits=5, decimal_places=2)
+    min_score = models.DecimalField(max_digits=5, decimal_places=2)
+    max_score = models.DecimalField(max_digits=5, decimal_places=2)
+    pass_count = models.PositiveIntegerField(default=0)
+    pass_rate = models.DecimalField(
+        max_digits=5, decimal_places=2)  # Percentage
+    # {"0-9": 0, "10-19": 1, ..., "90-100": 3}
+    distribution = models.JSONField(default=dict)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['class_assigned', 'subject', 'term', 'academic_year']
+
+    def __str__(self):
+        return f"{self.class_assigned} - {self.subject} - {self.term} {self.academic_year}"
+
+
+class ResultsJob(models.Model):
+    """Term-end results run over every active class"""
+
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        RUNNING = 'RUNNING', 'Running'
+        COMPLETED = 'COMPLETED', 'Completed'
+        FAILED = 'FAILED', 'Failed'
+
+    term = models.CharField(max_length=10,
+                            choices=SchoolProfile.TermChoices.choices)
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE)
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING)
+
+    # Metadata
+    started_by = models.ForeignKey(
+        User,
+        on_delete=models.PROTECT,
+        related_name='results_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['term', 'academic_year']
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Results {self.term} {self.academic_year} ({self.get_status_display()})"
+
+
+class ResultsJobClass(models.Model):
+    """Progress of a results job for one class"""
+    job = models.ForeignKey(
+        ResultsJob,
+        on_delete=models.CASCADE,
+        related_name='classes')
+    class_assigned = models.ForeignKey(Class, on_delete=models.CASCADE)
+    status = models.CharField(
+        max_length=10,
+        choices=ResultsJob.Status.choices,
+        default=ResultsJob.Status.PENDING)
+
+    # Outcome
+    report_cards = models.PositiveIntegerField(default=0)
+    duration = models.FloatField(null=True, blank=True)  # Seconds
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ['job', 'class_assigned']
+        ordering = ['class_assigned__name']
+
+    def __str__(self):
+        return f"{self.job} - {self.class_assigned}"
@@ -0,0 +1,273 @@
+import hashlib
+import io
+import json
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, transaction
+from django.template.loader import render_to_string
+
+from .models import ReportCard
+from apps.school.models import SchoolProfile
+
+
+REPORT_CARD_TEMPLATE = 'academics/pdf/report_card_pdf.html'
+
+# Fields that describe the stored PDF itself and so never feed its hash
+PDF_FIELDS = {'pdf_file', 'pdf_hash'}
+
+# Background queue for rendering jobs; one job runs at a time, each
+# rendering its batch in the process pool
+RENDER_QUEUE = ThreadPoolExecutor(max_workers=1, thread_name_prefix='report-card-pdf')
+
+
+def report_card_hash(report_card, school=None):
+    """
+    Content hash of everything a report card PDF is rendered from.
+
+    Any edit to the report card, the student's name or the school profile
+    changes the hash, which invalidates the stored PDF.
+    """
+    data = {
+        field.attname: getattr(report_card, field.attname)
+        for field in ReportCard._meta.concrete_fields
+        if field.name not in PDF_FIELDS
+    }
+    data['student_name'] = report_card.student.user.get_full_name()
+    data['admission_number'] = report_card.student.admission_number
+    data['school_updated_at'] = school.updated_at if school else None
+    data['template'] = REPORT_CARD_TEMPLATE
+
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def report_card_filename(report_card):
+    """Download filename for a report card PDF"""
+    return (
+        f"report_card_{report_card.student.admission_number}_"
+        f"{report_card.term}_{report_card.academic_year}.pdf"
+    ).replace('/', '-')
+
+
+def render_report_card_html(report_card, school=None):
+    """Render the report card template to an HTML string"""
+    return render_to_string(REPORT_CARD_TEMPLATE, {
+        'report_card': report_card,
+        'school': school,
+    })
+
+
+def html_to_pdf(html, base_url=None):
+    """Convert HTML to PDF bytes; runs inside renderer pool workers"""
+    from weasyprint import HTML
+    return HTML(string=html, base_url=base_url).write_pdf()
+
+
+def is_pdf_current(report_card, digest):
+    """Whether the stored PDF was rendered from the current report data"""
+    return bool(report_card.pdf_file) and report_card.pdf_hash == digest
+
+
+def store_pdf(report_card, pdf, digest):
+    """Replace the stored PDF of a report card (without saving the row)"""
+    if report_card.pdf_file:
+        report_card.pdf_file.delete(save=False)
+    report_card.pdf_file.save(
+        f"report_card_{report_card.pk}_{digest[:12]}.pdf",
+        ContentFile(pdf),
+        save=False
+    )
+    report_card.pdf_hash = digest
+
+
+def stored_report_card_pdf(report_card):
+    """The stored PDF of a report card, or None if it is missing or stale"""
+    digest = report_card_hash(report_card, SchoolProfile.objects.first())
+    return report_card.pdf_file if is_pdf_current(report_card, digest) else None
+
+
+def render_report_cards(report_cards, max_workers=None, force=False, base_url=None):
+    """
+    Render report card PDFs in a process pool and store them.
+
+    Templates are rendered here, where the database is available; the
+    CPU-bound WeasyPrint conversion runs in worker processes. Report cards
+    whose stored PDF already matches their content hash are skipped unless
+    ``force`` is set. Returns the number of PDFs rendered.
+    """
+    school = SchoolProfile.objects.first()
+    pending = []
+    for report_card in report_cards.select_related(
+        'student__user', 'class_assigned__class_teacher', 'academic_year',
+        'generated_by', 'approved_by'
+    ):
+        digest = report_card_hash(report_card, school)
+        if force or not is_pdf_current(report_card, digest):
+            pending.append((report_card, digest, render_report_card_html(report_card, school)))
+
+    if not pending:
+        return 0
+
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pdfs = pool.map(
+            html_to_pdf,
+            [html for _, _, html in pending],
+            [base_url] * len(pending)
+        )
+        for (report_card, digest, _), pdf in zip(pending, pdfs):
+            store_pdf(report_card, pdf, digest)
+
+    ReportCard.objects.bulk_update(
+        [report_card for report_card, _, _ in pending],
+        ['pdf_file', 'pdf_hash']
+    )
+    return len(pending)
+
+
+def render_queued_report_cards(report_card_ids, base_url=None):
+    """Render a queued batch of report cards; runs on the render queue"""
+    try:
+        return render_report_cards(
+            ReportCard.objects.filter(id__in=report_card_ids), base_url=base_url)
+    finally:
+        connections.close_all()
+
+
+def queue_report_card_pdfs(report_card_ids, base_url=None):
+    """
+    Render report card PDFs in the background once the current transaction
+    commits, so requests never wait on WeasyPrint and the renderer only
+    sees committed rows. Cards whose stored PDF is current are skipped.
+    """
+    report_card_ids = list(report_card_ids)
+    if report_card_ids:
+        transaction.on_commit(lambda: RENDER_QUEUE.submit(
+            render_queued_report_cards, report_card_ids, base_url))
+
+class SharedAssetRenderer:
+    """
+    Render many report cards while loading shared assets only once.
+
+    Fonts are configured once for the whole batch and every URL the
+    template references (school logo, stylesheets, web fonts) is fetched
+    and kept for the following documents.
+    """
+
+    def __init__(self, base_url=None):
+        from weasyprint.text.fonts import FontConfiguration
+        self.base_url = base_url
+        self.font_config = FontConfiguration()
+        self.fetched = {}
+
+    def url_fetcher(self, url):
+        from weasyprint import default_url_fetcher
+        if url not in self.fetched:
+            result = default_url_fetcher(url)
+            if 'file_obj' in result:
+                result['string'] = result.pop('file_obj').read()
+            self.fetched[url] = result
+        return dict(self.fetched[url])
+
+    def render(self, html):
+        """Lay out one HTML document using the shared assets"""
+        from weasyprint import HTML
+        return HTML(
+            string=html,
+            base_url=self.base_url,
+            url_fetcher=self.url_fetcher
+        ).render(font_config=self.font_config)
+
+    def write_pdf(self, html):
+        return self.render(html).write_pdf()
+
+
+class ChunkBuffer:
+    """Write-only file object whose contents are drained as chunks"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return b''.join(chunks)
+
+
+def iter_class_report_cards(report_cards):
+    """Report cards of a class in position order with their render data"""
+    return report_cards.select_related(
+        'student__user', 'class_assigned__class_teacher', 'academic_year',
+        'generated_by', 'approved_by'
+    ).order_by('position', 'student__user__first_name').iterator(chunk_size=50)
+
+
+def class_report_card_pdfs(report_cards, base_url=None):
+    """
+    Yield (report_card, pdf bytes) for a class in position order.
+
+    Stored PDFs that are still current are reused; the rest are rendered
+    with shared fonts and assets and stored for later downloads.
+    """
+    school = SchoolProfile.objects.first()
+    renderer = None
+    for report_card in iter_class_report_cards(report_cards):
+        digest = report_card_hash(report_card, school)
+        if is_pdf_current(report_card, digest):
+            with report_card.pdf_file.open('rb') as pdf_file:
+                pdf = pdf_file.read()
+        else:
+            renderer = renderer or SharedAssetRenderer(base_url)
+            pdf = renderer.write_pdf(render_report_card_html(report_card, school))
+            store_pdf(report_card, pdf, digest)
+            ReportCard.objects.filter(pk=report_card.pk).update(
+                pdf_file=report_card.pdf_file.name,
+                pdf_hash=digest
+            )
+        yield report_card, pdf
+
+
+def stream_report_cards_zip(report_cards, base_url=None):
+    """
+    Yield a ZIP archive of per-student report card PDFs chunk by chunk.
+
+    Only one PDF is held in memory at a time.
+    """
+    buffer = ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for report_card, pdf in class_report_card_pdfs(report_cards, base_url):
+            archive.writestr(report_card_filename(report_card), pdf)
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def write_merged_report_cards_pdf(report_cards, target, base_url=None):
+    """
+    Merge the report card PDFs of a class into one PDF written to ``target``.
+
+    Cards are appended one at a time from their stored PDFs, so only one
+    card is read and parsed at a time instead of laying out every card
+    before writing. Returns the number of pages written.
+    """
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for _, pdf in class_report_card_pdfs(report_cards, base_url):
+        writer.append(io.BytesIO(pdf))
+    if writer.pages:
+        writer.write(target)
+    return len(writer.pages)
@@ -0,0 +1,85 @@
+from django.db import models
+from django.db.models import Count, F, FloatField, Sum, Window
+from django.db.models.functions import Cast, DenseRank, Rank, Round
+
+from .models import SubjectScore
+
+
+class TiePolicy(models.TextChoices):
+    """How positions are assigned to students with equal averages"""
+    # Tied students share a position and the next one is skipped (1, 1, 3)
+    SKIP = 'SKIP', 'Shared position, skip next'
+    # Tied students share a position and numbering continues (1, 1, 2)
+    SHARED = 'SHARED', 'Shared position, no gaps'
+
+
+RANK_FUNCTIONS = {
+    TiePolicy.SKIP: Rank,
+    TiePolicy.SHARED: DenseRank,
+}
+
+
+def rank_students(term, academic_year, class_assigned=None, class_level=None,
+                  tie_policy=TiePolicy.SKIP, partition_by_class=False):
+    """
+    Rank students by average subject total in a single SQL aggregation.
+
+    Averages come from the same SubjectScore totals as report cards: the
+    sum of a student's subject totals for their class level divided by the
+    number of those subjects, rounded to two places. Report cards take
+    their positions from here, so both always agree. Scope the ranking to
+    one class, a whole class level, or (with neither argument) the whole
+    school. With ``partition_by_class`` every class in the scope is ranked
+    separately in the same query.
+
+    Returns a values queryset of dicts with ``student_id``, ``class_id``,
+    ``total``, ``subjects``, ``average`` and ``position``, best first.
+    """
+    scores = SubjectScore.objects.filter(
+        term=term,
+        academic_year=academic_year,
+        total_score__isnull=False,
+        subject__class_level=F('student__current_class__class_level'),
+        student__enrollment_status='ACTIVE'
+    )
+    if class_assigned is not None:
+        scores = scores.filter(student__current_class=class_assigned)
+    elif class_level is not None:
+        scores = scores.filter(student__current_class__class_level=class_level)
+
+    window = {
+        'expression': RANK_FUNCTIONS[TiePolicy(tie_policy)](),
+        'order_by': F('average').desc(),
+    }
+    if partition_by_class:
+        window['partition_by'] = [F('class_id')]
+
+    rankings = scores.values(
+        'student_id',
+        class_id=F('student__current_class_id')
+    ).annotate(
+        total=Sum('total_score'),
+        subjects=Count('subject', distinct=True),
+    ).annotate(
+        average=Round(Cast('total', FloatField()) / F('subjects'), 2),
+    ).annotate(
+        position=Window(**window),
+    )
+
+    if partition_by_class:
+        return rankings.order_by('class_id', 'position')
+    return rankings.order_by('position')
+
+
+def student_position(student, class_assigned, term, academic_year,
+                     tie_policy=TiePolicy.SKIP):
+    """Position of a student within a class, or None if unranked"""
+    rankings = rank_students(
+        term, academic_year,
+        class_assigned=class_assigned,
+        tie_policy=tie_policy
+    )
+    for row in rankings:
+        if row['student_id'] == student.id:
+            return row['position']
+    return None
@@ -0,0 +1,213 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import ClassPerformance, SubjectScore, ReportCard
+from .ranking import TiePolicy, rank_students
+from .timeline import write_term_snapshots
+from apps.attendance.models import Attendance, AttendanceSummary
+from apps.attendance.summaries import open_session_counts
+from apps.classes.models import Subject
+from apps.students.models import Student
+
+
+# Fields refreshed when a report card is regenerated. Comments, approval
+# state and the stored PDF are left untouched.
+REPORT_CARD_UPDATE_FIELDS = [
+    'class_assigned', 'subject_scores', 'subject_grades', 'total_score',
+    'average_score', 'position', 'total_students', 'total_school_days',
+    'days_present', 'days_absent', 'generated_by',
+]
+
+
+def load_subject_totals(student_ids, term, academic_year):
+    """Return {student_id: {subject_id: (total, grade)}} from SubjectScore"""
+    totals = defaultdict(dict)
+    rows = SubjectScore.objects.filter(
+        student_id__in=student_ids,
+        term=term,
+        academic_year=academic_year,
+        total_score__isnull=False
+    ).values_list('student_id', 'subject_id', 'total_score', 'grade')
+
+    for student_id, subject_id, total_score, grade in rows:
+        totals[student_id][subject_id] = (total_score, grade)
+
+    return totals
+
+
+def load_attendance_counts(student_ids, term, academic_year):
+    """
+    Return {student_id: (total, present, absent)} from the attendance
+    summaries, plus the rows of sessions that are still open
+    """
+    rows = AttendanceSummary.objects.filter(
+        student_id__in=student_ids,
+        term=term,
+        academic_year=academic_year
+    ).values_list('student_id', 'total_days', 'days_present', 'days_absent')
+
+    counts = {
+        student_id: (total, present, absent)
+        for student_id, total, present, absent in rows
+    }
+    for row in open_session_counts(Attendance.objects.filter(
+        student_id__in=student_ids,
+        session__term=term,
+        session__academic_year=academic_year
+    )):
+        total, present, absent = counts.get(row['student_id'], (0, 0, 0))
+        counts[row['student_id']] = (
+            total + row['total_days'],
+            present + row['days_present'],
+            absent + row['days_absent'],
+        )
+    return counts
+
+
+def generate_class_report_cards(class_assigned, term, academic_year,
+                                generated_by, students=None,
+                                tie_policy=TiePolicy.SKIP):
+    """
+    Generate report cards for a class in a fixed number of queries.
+
+    Subject totals (kept current in SubjectScore) and attendance for the
+    whole class are loaded up front and averages are computed in memory.
+    Positions come from ``rank_students`` over the same totals, so they
+    match every other ranking. Every report card is written with one bulk
+    upsert along with the students' timeline snapshots. Positions are
+    always computed against the whole class, even when ``students``
+    restricts which cards are written.
+    """
+    class_student_ids = list(Student.objects.filter(
+        current_class=class_assigned,
+        enrollment_status='ACTIVE'
+    ).values_list('id', flat=True))
+
+    if students is None:
+        target_ids = class_student_ids
+    else:
+        target_ids = [getattr(s, 'pk', s) for s in students]
+
+    subjects = list(Subject.objects.filter(
+        class_level=class_assigned.class_level
+    ).values_list('id', 'name'))
+
+    all_ids = set(class_student_ids) | set(target_ids)
+    totals = load_subject_totals(all_ids, term, academic_year)
+    attendance = load_attendance_counts(target_ids, term, academic_year)
+
+    results = {}
+    for student_id in all_ids:
+        subject_totals = totals.get(student_id, {})
+        subject_scores = {}
+        subject_grades = {}
+        total_score = Decimal('0')
+        for subject_id, subject_name in subjects:
+            if subject_id not in subject_totals:
+                continue
+            subject_total, grade = subject_totals[subject_id]
+            subject_scores[subject_name] = float(subject_total)
+            subject_grades[subject_name] = grade
+            total_score += subject_total
+
+        subject_count = len(subject_scores)
+        average_score = total_score / subject_count if subject_count else Decimal('0')
+        results[student_id] = (subject_scores, subject_grades, total_score, average_score)
+
+    positions = {
+        row['student_id']: row['position']
+        for row in rank_students(
+            term, academic_year, class_assigned=class_assigned, tie_policy=tie_policy)
+    }
+
+    report_cards = []
+    for student_id in target_ids:
+        subject_scores, subject_grades, total_score, average_score = results[student_id]
+        total_days, present_days, absent_days = attendance.get(student_id, (0, 0, 0))
+        report_cards.append(ReportCard(
+            student_id=student_id,
+            term=term,
+            academic_year=academic_year,
+            class_assigned=class_assigned,
+            subject_scores=subject_scores,
+            subject_grades=subject_grades,
+            total_score=round(total_score, 2),
+            average_score=round(average_score, 2),
+            position=positions.get(student_id),
+            total_students=len(class_student_ids),
+            total_school_days=total_days,
+            days_present=present_days,
+            days_absent=absent_days,
+            generated_by=generated_by,
+        ))
+
+    with transaction.atomic():
+        ReportCard.objects.bulk_create(
+            report_cards,
+            update_conflicts=True,
+            unique_fields=['student', 'term', 'academic_year'],
+            update_fields=REPORT_CARD_UPDATE_FIELDS,
+        )
+        write_term_snapshots(report_cards)
+
+    return ReportCard.objects.filter(
+        student_id__in=target_ids,
+        term=term,
+        academic_year=academic_year
+    )
+
+
+def calculate_class_performance(class_assigned, term, academic_year):
+    """Calculate performance metrics for a class"""
+    students = Student.objects.filter(
+        current_class=class_assigned,
+        enrollment_status='ACTIVE'
+    )
+
+    subjects = Subject.objects.filter(class_level=class_assigned.class_level)
+
+    # Weighted subject totals are kept current in SubjectScore
+    subject_totals = {}
+    for subject_id, total_score in SubjectScore.objects.filter(
+        student__in=students,
+        subject__in=subjects,
+        term=term,
+        academic_year=academic_year,
+        total_score__isnull=False
+    ).values_list('subject_id', 'total_score'):
+        subject_totals.setdefault(subject_id, []).append(total_score)
+
+    subject_averages = {}
+    all_averages = []
+
+    for subject in subjects:
+        totals = subject_totals.get(subject.id)
+        if totals:
+            subject_averages[subject.name] = float(round(sum(totals) / len(totals), 2))
+
+            # Collect all averages for overall class average
+            all_averages.extend(totals)
+
+    class_average = sum(all_averages) / len(all_averages) if all_averages else 0
+    highest_score = max(all_averages) if all_averages else 0
+    lowest_score = min(all_averages) if all_averages else 0
+    pass_rate = len([a for a in all_averages if a >= 50]) / len(all_averages) * 100 if all_averages else 0
+
+    # Save or update class performance
+    performance, created = ClassPerformance.objects.update_or_create(
+        class_assigned=class_assigned,
+        term=term,
+        academic_year=academic_year,
+        defaults={
+            'total_students': students.count(),
+            'subject_averages': subject_averages,
+            'class_average': class_average,
+            'highest_score': highest_score,
+            'lowest_score': lowest_score,
+            'pass_rate': pass_rate
+        }
+    )
+
+    return performance
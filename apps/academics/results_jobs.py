@@ -0,0 +1,131 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import ResultsJob, ResultsJobClass
+from .report_cards import calculate_class_performance, generate_class_report_cards
+from apps.classes.models import Class
+
+
+def start_results_job(term, academic_year, started_by, restart=False):
+    """
+    Create the results job for a term, or pick up an interrupted one.
+
+    Every active class of the academic year gets a progress row; classes that were already
+    completed keep their status unless ``restart`` is set, so a resumed run
+    only processes what is left.
+    """
+    job, created = ResultsJob.objects.get_or_create(
+        term=term,
+        academic_year=academic_year,
+        defaults={'started_by': started_by}
+    )
+
+    class_ids = Class.objects.filter(
+        status='ACTIVE', academic_year=academic_year
+    ).values_list('id', flat=True)
+    ResultsJobClass.objects.bulk_create(
+        [ResultsJobClass(job=job, class_assigned_id=class_id) for class_id in class_ids],
+        ignore_conflicts=True
+    )
+
+    if restart:
+        job.classes.update(
+            status=ResultsJob.Status.PENDING,
+            report_cards=0,
+            duration=None,
+            error='',
+            started_at=None,
+            completed_at=None
+        )
+        job.started_at = None
+
+    job.status = ResultsJob.Status.RUNNING
+    job.started_by = started_by
+    job.started_at = job.started_at or timezone.now()
+    job.completed_at = None
+    job.save()
+    return job
+
+
+def run_class_results(task_id):
+    """
+    Compute report cards and class performance for one class of a job.
+
+    Runs inside worker processes. The class's progress row is updated
+    before and after the work, and the outcome is returned as
+    (task_id, status, report_cards, duration, error).
+    """
+    task = ResultsJobClass.objects.select_related(
+        'job__academic_year', 'job__started_by', 'class_assigned__class_level'
+    ).get(pk=task_id)
+    ResultsJobClass.objects.filter(pk=task_id).update(
+        status=ResultsJob.Status.RUNNING,
+        started_at=timezone.now(),
+        error=''
+    )
+
+    job = task.job
+    count = 0
+    error = ''
+    start = time.perf_counter()
+    try:
+        with transaction.atomic():
+            report_cards = generate_class_report_cards(
+                task.class_assigned, job.term, job.academic_year, job.started_by
+            )
+            count = report_cards.count()
+            calculate_class_performance(task.class_assigned, job.term, job.academic_year)
+    except Exception as exc:
+        error = f"{type(exc).__name__}: {exc}"
+    duration = time.perf_counter() - start
+
+    status = ResultsJob.Status.FAILED if error else ResultsJob.Status.COMPLETED
+    ResultsJobClass.objects.filter(pk=task_id).update(
+        status=status,
+        report_cards=count,
+        duration=duration,
+        error=error,
+        completed_at=timezone.now()
+    )
+    return task_id, status, count, duration, error
+
+
+def run_results_job(job, max_workers=None, callback=None):
+    """
+    Process every class of a job that has not completed yet.
+
+    Classes are spread over a process pool (or run inline when
+    ``max_workers`` is 1). ``callback`` is called with each class's outcome
+    tuple as it finishes. Returns the number of classes that failed.
+    """
+    task_ids = list(job.classes.exclude(
+        status=ResultsJob.Status.COMPLETED
+    ).values_list('id', flat=True))
+
+    failed = 0
+    if max_workers == 1:
+        for task_id in task_ids:
+            result = run_class_results(task_id)
+            failed += result[1] == ResultsJob.Status.FAILED
+            if callback:
+                callback(result)
+    elif task_ids:
+        # Forked workers must not share the parent's database connections,
+        # and the parent stays off the database until the pool is done
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=django.setup) as pool:
+            futures = [pool.submit(run_class_results, task_id) for task_id in task_ids]
+            for future in as_completed(futures):
+                result = future.result()
+                failed += result[1] == ResultsJob.Status.FAILED
+                if callback:
+                    callback(result)
+
+    job.status = ResultsJob.Status.FAILED if failed else ResultsJob.Status.COMPLETED
+    job.completed_at = timezone.now()
+    job.save(update_fields=['status', 'completed_at'])
+    return failed
@@ -0,0 +1,374 @@
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Count, FilteredRelation, Max, Q
+
+from .approvals import reset_edited_approvals
+from .grading import calculate_grade
+from .models import Score, SubjectAssessment
+from .subject_scores import refresh_subject_scores
+from apps.students.models import Student
+
+
+SCORE_KEY = ['student', 'subject_assessment']
+# Written on every upsert so an edited score goes back for review
+APPROVAL_FIELDS = ['status', 'approved_by', 'approved_at']
+EXISTING_FIELDS = [
+    'id', 'student_id', 'subject_assessment_id', 'score', 'last_updated',
+    'status', 'approved_by_id', 'approved_at',
+]
+
+
+def parse_score(value):
+    """Parse a submitted score into a Decimal, or None if it is not a number"""
+    if isinstance(value, Decimal):
+        return value
+    try:
+        score = Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        return None
+    return score if score.is_finite() else None
+
+
+def score_error(score, subject_assessment):
+    """Validation error for a parsed score, or None if it can be saved"""
+    if subject_assessment is None:
+        return "Unknown assessment."
+    if score is None:
+        return "Invalid score value."
+    if score < 0:
+        return "Score cannot be negative."
+    if score > subject_assessment.max_score:
+        return f"Score cannot exceed {subject_assessment.max_score}."
+    return None
+
+
+def subject_score_keys(cells, assessments):
+    """SubjectScore keys for (student_id, subject_assessment_id) cells"""
+    return {
+        (student_id, assessments[subject_assessment_id].subject_id,
+         assessments[subject_assessment_id].term,
+         assessments[subject_assessment_id].academic_year_id)
+        for student_id, subject_assessment_id in cells
+    }
+
+
+def ingest_scores(entries, recorded_by, remarks=''):
+    """
+    Validate and upsert a grid of scores in one transaction.
+
+    ``entries`` is an iterable of (student, subject_assessment, score)
+    tuples, where the first two may be model instances or ids. Every entry
+    is checked against its assessment's ``max_score`` in a single pass;
+    valid rows are written with one ``bulk_create(update_conflicts=True)``
+    on the (student, subject_assessment) key and the affected SubjectScore
+    totals are refreshed in the same transaction. Approved or rejected
+    scores whose value changes go back to pending.
+
+    Returns ``{'saved': int, 'errors': [{'row', 'student_id',
+    'subject_assessment_id', 'error'}]}``. When the same cell appears more
+    than once the last entry wins.
+    """
+    rows = [
+        (idx, getattr(student, 'pk', student), getattr(subject_assessment, 'pk', subject_assessment), value)
+        for idx, (student, subject_assessment, value) in enumerate(entries)
+    ]
+
+    assessments = SubjectAssessment.objects.in_bulk(
+        {row[2] for row in rows},
+        field_name='id'
+    )
+    student_ids = set(Student.objects.filter(
+        id__in={row[1] for row in rows}
+    ).values_list('id', flat=True))
+
+    errors = []
+    scores = {}
+    for idx, student_id, subject_assessment_id, value in rows:
+        score = parse_score(value)
+        if student_id not in student_ids:
+            error = "Unknown student."
+        else:
+            error = score_error(score, assessments.get(subject_assessment_id))
+        if error is None:
+            scores[(student_id, subject_assessment_id)] = Score(
+                student_id=student_id,
+                subject_assessment_id=subject_assessment_id,
+                score=score,
+                remarks=remarks,
+                recorded_by=recorded_by,
+            )
+            continue
+        errors.append({
+            'row': idx,
+            'student_id': student_id,
+            'subject_assessment_id': subject_assessment_id,
+            'error': error,
+        })
+
+    with transaction.atomic():
+        existing = {}
+        if scores:
+            existing = {
+                (row.student_id, row.subject_assessment_id): row
+                for row in Score.objects.select_for_update().filter(
+                    student_id__in={key[0] for key in scores},
+                    subject_assessment_id__in={key[1] for key in scores},
+                ).only(*EXISTING_FIELDS)
+            }
+        reset_edited_approvals(scores, existing, recorded_by)
+        Score.objects.bulk_create(
+            scores.values(),
+            update_conflicts=True,
+            unique_fields=SCORE_KEY,
+            update_fields=['score', 'remarks', 'recorded_by', 'last_updated'] + APPROVAL_FIELDS,
+        )
+        refresh_subject_scores(subject_score_keys(scores, assessments))
+
+    return {'saved': len(scores), 'errors': errors}
+
+
+def score_version(last_updated):
+    """Version stamp clients send back to detect concurrent edits"""
+    return last_updated.isoformat() if last_updated else None
+
+
+def cell_filter(cells):
+    """Q matching the Score rows for (student_id, subject_assessment_id) cells"""
+    condition = Q()
+    for student_id, subject_assessment_id in cells:
+        condition |= Q(student_id=student_id, subject_assessment_id=subject_assessment_id)
+    return condition
+
+
+def save_score_cells(cells, recorded_by):
+    """
+    Save a batch of score-grid edits with optimistic concurrency.
+
+    ``cells`` is an iterable of dicts with ``student_id``,
+    ``subject_assessment_id``, ``score`` and optionally ``version``: the
+    ``last_updated`` stamp the client last saw (``None`` for a cell it saw
+    empty). A cell whose stored version no longer matches is rejected as a
+    conflict and reported with the current value; cells without a
+    ``version`` key are saved unconditionally. Accepted cells are written
+    with one bulk upsert while the existing rows are locked, and the
+    affected SubjectScore totals are refreshed in the same transaction.
+    Approved or rejected scores whose value changes go back to pending.
+
+    Returns one result per cell, in order, with ``status`` set to
+    ``'saved'``, ``'conflict'`` or ``'error'`` and the cell's current
+    ``score_id``, ``score``, ``percentage``, ``grade`` and ``version``.
+    """
+    cells = list(cells)
+    keys = []
+    for cell in cells:
+        try:
+            keys.append((int(cell['student_id']), int(cell['subject_assessment_id'])))
+        except (KeyError, TypeError, ValueError):
+            keys.append(None)
+
+    valid_keys = {key for key in keys if key}
+    assessments = SubjectAssessment.objects.select_related('assessment').in_bulk(
+        {key[1] for key in valid_keys},
+        field_name='id'
+    )
+    student_ids = set(Student.objects.filter(
+        id__in={key[0] for key in valid_keys}
+    ).values_list('id', flat=True))
+
+    results = []
+    with transaction.atomic():
+        existing = {}
+        if valid_keys:
+            existing = {
+                (row.student_id, row.subject_assessment_id): row
+                for row in Score.objects.select_for_update().filter(
+                    cell_filter(valid_keys)
+                ).only(*EXISTING_FIELDS)
+            }
+
+        scores = {}
+        for idx, (cell, key) in enumerate(zip(cells, keys)):
+            result = {'row': idx, 'status': 'error', 'error': None}
+            results.append(result)
+            if key is None:
+                result['error'] = "Invalid cell."
+                continue
+            result.update(student_id=key[0], subject_assessment_id=key[1])
+
+            score = parse_score(cell.get('score'))
+            current = existing.get(key)
+            if key[0] not in student_ids:
+                result['error'] = "Unknown student."
+            elif 'version' in cell and cell['version'] != score_version(
+                    current.last_updated if current else None):
+                result['status'] = 'conflict'
+                result['error'] = "This score was changed by someone else."
+            else:
+                result['error'] = score_error(score, assessments.get(key[1]))
+            if result['error'] is None:
+                result['status'] = 'saved'
+                scores[key] = Score(
+                    student_id=key[0],
+                    subject_assessment_id=key[1],
+                    score=score,
+                    recorded_by=recorded_by,
+                )
+
+        if scores:
+            reset_edited_approvals(scores, existing, recorded_by)
+            Score.objects.bulk_create(
+                scores.values(),
+                update_conflicts=True,
+                unique_fields=SCORE_KEY,
+                update_fields=['score', 'recorded_by', 'last_updated'] + APPROVAL_FIELDS,
+            )
+            refresh_subject_scores(subject_score_keys(scores, assessments))
+            existing.update(
+                ((row.student_id, row.subject_assessment_id), row)
+                for row in Score.objects.filter(cell_filter(scores)).only(
+                    'id', 'student_id', 'subject_assessment_id', 'score', 'last_updated')
+            )
+
+    for result in results:
+        current = existing.get((result.get('student_id'), result.get('subject_assessment_id')))
+        subject_assessment = assessments.get(result.get('subject_assessment_id'))
+        result.update(score_id=None, score=None, percentage=None, grade=None, version=None)
+        if current and subject_assessment:
+            max_score = subject_assessment.max_score
+            percentage = current.score / max_score * 100 if max_score > 0 else Decimal('0')
+            result.update(
+                score_id=current.id,
+                score=float(current.score),
+                percentage=float(round(percentage, 2)),
+                grade=calculate_grade(percentage, subject_assessment.assessment.grade_boundaries),
+                version=score_version(current.last_updated),
+            )
+    return results
+
+
+# Columns of the students-with-scores payload, in order
+STUDENT_SCORE_COLUMNS = [
+    'student_id', 'student_name', 'admission_number', 'score_id', 'score',
+]
+
+
+def class_students(class_id):
+    """Active students of a class"""
+    return Student.objects.filter(
+        current_class_id=class_id,
+        enrollment_status='ACTIVE'
+    )
+
+
+def students_with_scores(class_id, subject_assessment_id):
+    """
+    Active students of a class with their score for one assessment.
+
+    Loaded in one query (students left-joined to their score for the
+    assessment) and returned column-wise: ``{column: [values...]}`` in
+    ``STUDENT_SCORE_COLUMNS`` order, one entry per student.
+    """
+    rows = class_students(class_id).annotate(
+        assessment_score=FilteredRelation(
+            'scores',
+            condition=Q(scores__subject_assessment_id=subject_assessment_id)
+        )
+    ).order_by(
+        'user__first_name', 'user__last_name'
+    ).values_list(
+        'id', 'user__first_name', 'user__last_name', 'user__username',
+        'admission_number', 'assessment_score__id', 'assessment_score__score'
+    )
+
+    columns = {column: [] for column in STUDENT_SCORE_COLUMNS}
+    for student_id, first_name, last_name, username, admission_number, score_id, score in rows:
+        columns['student_id'].append(student_id)
+        columns['student_name'].append(f"{first_name} {last_name}".strip() or username)
+        columns['admission_number'].append(admission_number)
+        columns['score_id'].append(score_id)
+        columns['score'].append(float(score) if score is not None else None)
+    return columns
+
+
+def students_with_scores_version(class_id, subject_assessment_id):
+    """
+    (last_modified, etag) of the students-with-scores payload.
+
+    Derived from the newest ``Score.last_updated`` and score count of the
+    assessment plus the newest change and size of the class roster, so
+    edits, deletions and roster changes all produce a new ETag. Both are
+    cheap aggregates, which lets unchanged polls be answered with a 304
+    before the payload is built.
+    """
+    scores = Score.objects.filter(
+        subject_assessment_id=subject_assessment_id
+    ).aggregate(latest=Max('last_updated'), count=Count('id'))
+    students = class_students(class_id).aggregate(
+        latest=Max('updated_at'), count=Count('id'))
+
+    changes = [t for t in (scores['latest'], students['latest']) if t]
+    last_modified = max(changes) if changes else None
+    fingerprint = (
+        f"{class_id}:{subject_assessment_id}:"
+        f"{scores['latest']}:{scores['count']}:{students['latest']}:{students['count']}"
+    )
+    return last_modified, hashlib.md5(fingerprint.encode()).hexdigest()
+
+
+def load_score_matrix(class_id, subject_assessments):
+    """
+    Dense student x assessment score grid for a class.
+
+    Built from flat ``values_list`` rows: students and assessments are
+    listed once, with index maps placing each score at
+    ``row * width + column`` in flat ``scores``, ``score_ids`` and
+    ``versions`` arrays (``None`` where nothing is recorded). The result is
+    plain JSON-serializable data, so it can be rendered or sent to the
+    front end as-is.
+    """
+    if not subject_assessments.ordered:
+        subject_assessments = subject_assessments.order_by('id')
+    assessments = list(subject_assessments.values_list(
+        'id', 'assessment__name', 'max_score'))
+    students = [
+        (student_id, f"{first_name} {last_name}".strip() or username, admission_number)
+        for student_id, first_name, last_name, username, admission_number
+        in class_students(class_id).order_by(
+            'user__first_name', 'user__last_name'
+        ).values_list(
+            'id', 'user__first_name', 'user__last_name', 'user__username',
+            'admission_number')
+    ]
+
+    row_index = {student[0]: idx for idx, student in enumerate(students)}
+    column_index = {assessment[0]: idx for idx, assessment in enumerate(assessments)}
+    width = len(assessments)
+    size = len(students) * width
+    scores = [None] * size
+    score_ids = [None] * size
+    versions = [None] * size
+
+    rows = Score.objects.filter(
+        student__current_class_id=class_id,
+        student__enrollment_status='ACTIVE',
+        subject_assessment_id__in=list(column_index)
+    ).values_list('student_id', 'subject_assessment_id', 'id', 'score', 'last_updated')
+    for student_id, subject_assessment_id, score_id, score, last_updated in rows:
+        cell = row_index[student_id] * width + column_index[subject_assessment_id]
+        scores[cell] = float(score)
+        score_ids[cell] = score_id
+        versions[cell] = score_version(last_updated)
+
+    return {
+        'students': students,
+        'assessments': [
+            (assessment_id, name, float(max_score))
+            for assessment_id, name, max_score in assessments
+        ],
+        'width': width,
+        'scores': scores,
+        'score_ids': score_ids,
+        'versions': versions,
+    }
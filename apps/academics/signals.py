@@ -0,0 +1,54 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import Assessment, Score, SubjectAssessment
+from .subject_scores import refresh_subject_scores, refresh_subject_scores_for
+
+
+def subject_score_keys(student_ids, subject_assessment_ids):
+    """SubjectScore keys for every (student, subject_assessment) combination"""
+    assessments = SubjectAssessment.objects.filter(
+        id__in=subject_assessment_ids
+    ).values_list('subject_id', 'term', 'academic_year_id')
+    return {
+        (student_id, subject_id, term, academic_year_id)
+        for student_id in student_ids
+        for subject_id, term, academic_year_id in assessments
+    }
+
+
+@receiver(post_init, sender=Score)
+def remember_score_key(sender, instance, **kwargs):
+    """Keep the loaded key so a moved score also refreshes its old total"""
+    instance._loaded_key = (instance.student_id, instance.subject_assessment_id)
+
+
+@receiver(post_save, sender=Score)
+@receiver(post_delete, sender=Score)
+def update_subject_score(sender, instance, **kwargs):
+    """Recalculate the SubjectScore row affected by a score change"""
+    student_ids = {instance.student_id}
+    subject_assessment_ids = {instance.subject_assessment_id}
+    loaded_student_id, loaded_subject_assessment_id = getattr(
+        instance, '_loaded_key', (None, None))
+    if loaded_student_id:
+        student_ids.add(loaded_student_id)
+        subject_assessment_ids.add(loaded_subject_assessment_id)
+
+    refresh_subject_scores(subject_score_keys(student_ids, subject_assessment_ids))
+    instance._loaded_key = (instance.student_id, instance.subject_assessment_id)
+
+
+@receiver(post_save, sender=SubjectAssessment)
+def update_subject_scores_for_assessment(sender, instance, created, **kwargs):
+    """A changed max score affects every total using this assessment"""
+    if not created:
+        refresh_subject_scores_for(Score.objects.filter(subject_assessment=instance))
+
+
+@receiver(post_save, sender=Assessment)
+def update_subject_scores_for_weight(sender, instance, created, **kwargs):
+    """A changed weight affects every total using this assessment type"""
+    if not created:
+        refresh_subject_scores_for(
+            Score.objects.filter(subject_assessment__assessment=instance))
@@ -0,0 +1,216 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, FloatField, Q, Sum
+from django.db.models.functions import Cast
+
+from .analytics import rebuild_subject_performance, refresh_subject_performance
+from .grading import get_grade_scale
+from .models import Score, SubjectScore
+from apps.students.models import StudentHistory
+
+
+SUBJECT_SCORE_KEY = ['student', 'subject', 'term', 'academic_year']
+# class_assigned is only set when a row is created, so refreshing a past
+# year's totals never moves it to the student's current class
+SUBJECT_SCORE_UPDATE_FIELDS = ['total_score', 'grade']
+
+
+def weighted_score():
+    """Expression for a score's weighted contribution to its subject total"""
+    return (
+        Cast('score', FloatField())
+        / Cast('subject_assessment__max_score', FloatField())
+        * Cast('subject_assessment__assessment__weight_percentage', FloatField())
+    )
+
+
+def aggregate_subject_totals(scores):
+    """Group a Score queryset into one weighted total per SubjectScore key"""
+    return scores.filter(
+        subject_assessment__max_score__gt=0,
+        student__current_class__isnull=False
+    ).values(
+        'student_id',
+        'student__current_class_id',
+        'student__current_class__academic_year_id',
+        subject_id=F('subject_assessment__subject_id'),
+        term=F('subject_assessment__term'),
+        academic_year_id=F('subject_assessment__academic_year_id'),
+    ).annotate(
+        total=Sum(weighted_score()),
+    ).order_by()
+
+
+def history_classes(rows):
+    """
+    {(student_id, academic_year_id): class_id} from the class history, for
+    aggregate rows of a year other than the student's current class's
+    """
+    keys = {
+        (row['student_id'], row['academic_year_id']) for row in rows
+        if row['student__current_class__academic_year_id'] != row['academic_year_id']
+    }
+    if not keys:
+        return {}
+    classes = {}
+    for student_id, academic_year_id, class_id in StudentHistory.objects.filter(
+        student_id__in={student_id for student_id, _ in keys},
+        academic_year_id__in={academic_year_id for _, academic_year_id in keys}
+    ).order_by('date_from').values_list('student_id', 'academic_year_id', 'class_assigned_id'):
+        # The latest class of the year wins
+        classes[(student_id, academic_year_id)] = class_id
+    return classes
+
+
+def build_subject_scores(rows):
+    """
+    Build unsaved SubjectScores from aggregate rows, graded in one pass.
+
+    A row's class is the class the student was in during the row's academic
+    year: the current class when it belongs to that year, otherwise the
+    class history for the year, falling back to the current class.
+    """
+    rows = list(rows)
+    totals = [Decimal(str(round(row['total'], 2))) for row in rows]
+    past_classes = history_classes(rows)
+    return [
+        SubjectScore(
+            student_id=row['student_id'],
+            subject_id=row['subject_id'],
+            term=row['term'],
+            academic_year_id=row['academic_year_id'],
+            class_assigned_id=past_classes.get(
+                (row['student_id'], row['academic_year_id']), row['student__current_class_id']),
+            total_score=total,
+            grade=grade,
+        )
+        for row, total, grade in zip(rows, totals, get_grade_scale().grade_many(totals))
+    ]
+
+
+def group_keys(keys):
+    """Group SubjectScore keys by (subject_id, term, academic_year_id)"""
+    groups = defaultdict(set)
+    for student_id, subject_id, term, academic_year_id in keys:
+        groups[(subject_id, term, academic_year_id)].add(student_id)
+    return groups
+
+
+def key_filter(keys):
+    """Q matching the SubjectScore rows for the given keys"""
+    condition = Q()
+    for (subject_id, term, academic_year_id), student_ids in group_keys(keys).items():
+        condition |= Q(
+            student_id__in=student_ids,
+            subject_id=subject_id,
+            term=term,
+            academic_year_id=academic_year_id,
+        )
+    return condition
+
+
+def refresh_subject_scores(keys):
+    """
+    Recalculate the SubjectScore rows for the given keys.
+
+    ``keys`` is an iterable of (student_id, subject_id, term,
+    academic_year_id) tuples. The totals are computed in one grouped query
+    and written with one bulk upsert; keys with no scores left are deleted.
+    The analytics cube cells the students belong to are refreshed with them.
+    """
+    keys = set(keys)
+    if not keys:
+        return 0
+
+    score_filter = Q()
+    for (subject_id, term, academic_year_id), student_ids in group_keys(keys).items():
+        score_filter |= Q(
+            student_id__in=student_ids,
+            subject_assessment__subject_id=subject_id,
+            subject_assessment__term=term,
+            subject_assessment__academic_year_id=academic_year_id,
+        )
+
+    subject_scores = build_subject_scores(
+        aggregate_subject_totals(Score.objects.filter(score_filter)))
+    found = {
+        (s.student_id, s.subject_id, s.term, s.academic_year_id)
+        for s in subject_scores
+    }
+
+    stale_filter = key_filter(keys - found)
+
+    # Cube cells the affected students were counted in before and after
+    cells = set(SubjectScore.objects.filter(key_filter(keys)).values_list(
+        'class_assigned_id', 'subject_id', 'term', 'academic_year_id'))
+    cells.update(
+        (s.class_assigned_id, s.subject_id, s.term, s.academic_year_id)
+        for s in subject_scores
+    )
+
+    with transaction.atomic():
+        SubjectScore.objects.bulk_create(
+            subject_scores,
+            update_conflicts=True,
+            unique_fields=SUBJECT_SCORE_KEY,
+            update_fields=SUBJECT_SCORE_UPDATE_FIELDS,
+        )
+        if stale_filter:
+            SubjectScore.objects.filter(stale_filter).delete()
+        refresh_subject_performance(cells)
+
+    return len(subject_scores)
+
+
+def refresh_subject_scores_for(scores):
+    """Recalculate every SubjectScore touched by a Score queryset"""
+    keys = scores.values_list(
+        'student_id',
+        'subject_assessment__subject_id',
+        'subject_assessment__term',
+        'subject_assessment__academic_year_id',
+    ).distinct().order_by()
+    return refresh_subject_scores(keys)
+
+
+def rebuild_subject_scores(academic_year=None, term=None, batch_size=1000):
+    """
+    Rebuild the SubjectScore table from raw scores.
+
+    Existing rows are upserted so their remarks survive; rows that no
+    longer have any scores behind them are deleted. The analytics cube is
+    rebuilt for the same scope.
+    """
+    scores = Score.objects.all()
+    subject_scores = SubjectScore.objects.all()
+    if academic_year is not None:
+        scores = scores.filter(subject_assessment__academic_year=academic_year)
+        subject_scores = subject_scores.filter(academic_year=academic_year)
+    if term is not None:
+        scores = scores.filter(subject_assessment__term=term)
+        subject_scores = subject_scores.filter(term=term)
+
+    rows = build_subject_scores(aggregate_subject_totals(scores))
+    found = {(s.student_id, s.subject_id, s.term, s.academic_year_id) for s in rows}
+    stale_ids = [
+        pk for pk, *key in subject_scores.values_list(
+            'id', 'student_id', 'subject_id', 'term', 'academic_year_id')
+        if tuple(key) not in found
+    ]
+
+    with transaction.atomic():
+        SubjectScore.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=SUBJECT_SCORE_KEY,
+            update_fields=SUBJECT_SCORE_UPDATE_FIELDS,
+        )
+        for start in range(0, len(stale_ids), batch_size):
+            SubjectScore.objects.filter(
+                id__in=stale_ids[start:start + batch_size]).delete()
+        rebuild_subject_performance(academic_year=academic_year, term=term)
+
+    return len(rows)
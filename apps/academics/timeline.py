@@ -0,0 +1,102 @@
+from collections import Counter
+from decimal import Decimal
+
+from .models import ReportCard, StudentTermSnapshot
+
+
+SNAPSHOT_KEY = ['student', 'academic_year', 'term']
+SNAPSHOT_UPDATE_FIELDS = [
+    'class_assigned', 'total_score', 'average_score', 'position',
+    'total_students', 'subject_count', 'grade_distribution',
+    'total_school_days', 'days_present', 'attendance_percentage', 'updated_at',
+]
+
+
+def build_term_snapshot(report_card):
+    """Build an unsaved StudentTermSnapshot from a (possibly unsaved) report card"""
+    total_days = report_card.total_school_days
+    attendance_percentage = (
+        round(Decimal(report_card.days_present) * 100 / total_days, 2)
+        if total_days else Decimal('0')
+    )
+    return StudentTermSnapshot(
+        student_id=report_card.student_id,
+        academic_year_id=report_card.academic_year_id,
+        term=report_card.term,
+        class_assigned_id=report_card.class_assigned_id,
+        total_score=report_card.total_score,
+        average_score=report_card.average_score,
+        position=report_card.position,
+        total_students=report_card.total_students,
+        subject_count=len(report_card.subject_scores),
+        grade_distribution=dict(Counter(report_card.subject_grades.values())),
+        total_school_days=total_days,
+        days_present=report_card.days_present,
+        attendance_percentage=attendance_percentage,
+    )
+
+
+def write_term_snapshots(report_cards, batch_size=None):
+    """Upsert the timeline snapshots for the given report cards"""
+    return StudentTermSnapshot.objects.bulk_create(
+        [build_term_snapshot(report_card) for report_card in report_cards],
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=SNAPSHOT_KEY,
+        update_fields=SNAPSHOT_UPDATE_FIELDS,
+    )
+
+
+def rebuild_term_snapshots(academic_year=None, term=None, batch_size=1000):
+    """Rebuild timeline snapshots from existing report cards"""
+    report_cards = ReportCard.objects.only(
+        'student_id', 'academic_year_id', 'term', 'class_assigned_id',
+        'total_score', 'average_score', 'position', 'total_students',
+        'subject_scores', 'subject_grades', 'total_school_days', 'days_present'
+    )
+    if academic_year is not None:
+        report_cards = report_cards.filter(academic_year=academic_year)
+    if term is not None:
+        report_cards = report_cards.filter(term=term)
+
+    count = 0
+    batch = []
+    for report_card in report_cards.iterator(chunk_size=batch_size):
+        batch.append(report_card)
+        if len(batch) == batch_size:
+            count += len(write_term_snapshots(batch))
+            batch = []
+    if batch:
+        count += len(write_term_snapshots(batch))
+    return count
+
+
+def student_timeline(student):
+    """
+    A student's results for every term, oldest first.
+
+    Read from the snapshot table in one query on its (student, year, term)
+    index, so a full multi-year history costs the same as a single term.
+    """
+    snapshots = StudentTermSnapshot.objects.filter(
+        student=student
+    ).select_related('academic_year', 'class_assigned').order_by(
+        'academic_year__start_date', 'term'
+    )
+    return [
+        {
+            'academic_year': snapshot.academic_year.name,
+            'academic_year_id': snapshot.academic_year_id,
+            'term': snapshot.term,
+            'term_display': snapshot.get_term_display(),
+            'class_name': snapshot.class_assigned.name,
+            'total_score': float(snapshot.total_score) if snapshot.total_score is not None else None,
+            'average_score': float(snapshot.average_score) if snapshot.average_score is not None else None,
+            'position': snapshot.position,
+            'total_students': snapshot.total_students,
+            'subject_count': snapshot.subject_count,
+            'grade_distribution': snapshot.grade_distribution,
+            'attendance_percentage': float(snapshot.attendance_percentage),
+        }
+        for snapshot in snapshots
+    ]
@@ -16,6 +16,7 @@ urlpatterns = [
     path('teacher/score-entry/edit/<int:class_id>/<int:subject_id>/', views.edit_scores, name='edit_scores'),
     path('teacher/score-entry/approve/<int:class_id>/<int:subject_id>/', views.approve_scores, name='approve_scores'),
     path('teacher/score-entry/save/', views.save_scores_ajax, name='save_scores_ajax'),
+    path('teacher/score-entry/save-batch/', views.save_scores_batch, name='save_scores_batch'),
 
     path('teacher/report-cards/', views.report_card_list, name='report_card_list'),
     path('teacher/report-cards/<int:class_id>/', views.report_card_list, name='report_card_list'),
@@ -23,6 +24,8 @@ urlpatterns = [
     path('teacher/report-cards/<int:pk>/', views.view_report_card, name='report_card_detail'),
     # PDF download for individual report card (teachers, students, parents)
     path('teacher/report-cards/<int:pk>/download/', views.download_report_card_pdf, name='download_report_card_pdf'),
+    # Whole-class export as one merged PDF or a ZIP of per-student PDFs
+    path('teacher/report-cards/class/<int:class_id>/download/', views.download_class_report_cards, name='download_class_report_cards'),
 
     # Principal URLs
     path('principal/class-performance/', views.class_performance, name='class_performance'),
@@ -35,6 +38,9 @@ urlpatterns = [
     # API URLs
     path('api/assessments/', views.get_assessments_for_subject, name='api_get_assessments_for_subject'),
     path('api/students-with-scores/', views.get_students_with_scores, name='api_get_students_with_scores'),
+    path('api/performance-analytics/', views.performance_analytics, name='api_performance_analytics'),
+    path('api/score-approval/', views.score_approval_api, name='api_score_approval'),
+    path('api/student-timeline/<int:student_id>/', views.student_timeline_api, name='api_student_timeline'),
 
     # Admin URLs (existing)
     path('admin/assessments/', views.AssessmentListView.as_view(), name='assessment_list'),
@@ -7,18 +7,34 @@ from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Q, Avg, Sum, Count, Max, Min
 from django.db.models.functions import Coalesce
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, FileResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
 from django.utils import timezone
-from django.template.loader import render_to_string
-from weasyprint import HTML
+from django.views.decorators.http import condition
 import tempfile
 import json
+from collections import Counter
 
+from .analytics import performance_summary
+from .approvals import apply_score_approval
 from .models import (
     Assessment, SubjectAssessment, Score, SubjectScore,
     ReportCard, ClassPerformance
 )
+from .pdf import (
+    queue_report_card_pdfs, report_card_filename, stored_report_card_pdf,
+    stream_report_cards_zip, write_merged_report_cards_pdf
+)
+from .ranking import rank_students, student_position
+from .report_cards import (
+    calculate_class_performance, generate_class_report_cards
+)
+from .scores import (
+    ingest_scores, load_score_matrix, save_score_cells,
+    students_with_scores, students_with_scores_version
+)
+from .timeline import student_timeline
 from .forms import (
     AssessmentForm, SubjectAssessmentForm, BulkScoreEntryForm,
     IndividualScoreForm, ScoreApprovalForm, ReportCardGenerationForm,
@@ -175,7 +191,7 @@ def bulk_score_entry(request):
         form = BulkScoreEntryForm(request.POST)
         if form.is_valid():
             subject_assessment = form.cleaned_data['subject_assessment']
-            students = form.cleaned_data.get('students', [])
+            students = list(form.cleaned_data.get('students', []))
             scores_text = form.cleaned_data.get('scores', '')
             remarks = form.cleaned_data.get('remarks', '')
             
@@ -186,27 +202,18 @@ def bulk_score_entry(request):
                 messages.error(request, "Number of scores doesn't match number of students.")
                 return redirect('academics:bulk_score_entry')
             
-            # Create scores
-            created_count = 0
-            for student, score_value in zip(students, score_list):
-                try:
-                    score = float(score_value)
-                    Score.objects.update_or_create(
-                        student=student,
-                        subject_assessment=subject_assessment,
-                        defaults={
-                            'score': score,
-                            'remarks': remarks,
-                            'recorded_by': request.user
-                        }
-                    )
-                    created_count += 1
-                except ValueError:
-                    messages.warning(request, f"Invalid score value for {student.user.get_full_name()}")
-                except Exception as e:
-                    messages.error(request, f"Error saving score for {student.user.get_full_name()}: {str(e)}")
+            # Validate and save every score in one transaction
+            result = ingest_scores(
+                [(student, subject_assessment, value) for student, value in zip(students, score_list)],
+                recorded_by=request.user,
+                remarks=remarks
+            )
+            
+            for error in result['errors']:
+                student = students[error['row']]
+                messages.warning(request, f"{student.user.get_full_name()}: {error['error']}")
             
-            messages.success(request, f"{created_count} scores recorded successfully.")
+            messages.success(request, f"{result['saved']} scores recorded successfully.")
             return redirect('academics:score_entry')
     else:
         # Get parameters from URL
@@ -305,7 +312,7 @@ def edit_scores(request, class_id, subject_id):
         subject=subject,
         term=current_term.term if current_term else None,
         academic_year__is_current=True
-    )
+    ).select_related('assessment').order_by('id')
     
     # Get students in this class
     students = Student.objects.filter(
@@ -313,22 +320,10 @@ def edit_scores(request, class_id, subject_id):
         enrollment_status='ACTIVE'
     ).select_related('user')
     
-    # Get existing scores
-    scores = Score.objects.filter(
-        student__in=students,
-        subject_assessment__in=subject_assessments
-    ).select_related('student__user', 'subject_assessment__assessment')
-    
-    # Organize scores by student and assessment
-    score_matrix = {}
-    for student in students:
-        score_matrix[student.id] = {
-            'student': student,
-            'scores': {}
-        }
-    
-    for score in scores:
-        score_matrix[score.student.id]['scores'][score.subject_assessment_id] = score
+    # Dense student x assessment grid of existing scores
+    score_matrix = load_score_matrix(class_obj.id, subject_assessments)
+    if request.GET.get('format') == 'json':
+        return JsonResponse(score_matrix)
     
     context = {
         'class_obj': class_obj,
@@ -353,26 +348,49 @@ def save_scores_ajax(request):
         try:
             if score_id:
                 score = get_object_or_404(Score, id=score_id)
-            else:
-                score = Score()
-                score.student_id = student_id
-                score.subject_assessment_id = assessment_id
-                score.recorded_by = request.user
+                student_id = score.student_id
+                assessment_id = score.subject_assessment_id
             
-            score.score = float(score_value)
-            score.save()
+            result = save_score_cells([{
+                'student_id': student_id,
+                'subject_assessment_id': assessment_id,
+                'score': score_value,
+            }], request.user)[0]
+            if result['status'] != 'saved':
+                return JsonResponse({'success': False, 'error': result['error']})
             
             return JsonResponse({
                 'success': True,
-                'score_id': score.id,
-                'percentage': score.percentage,
-                'grade': score.grade
+                'score_id': result['score_id'],
+                'percentage': result['percentage'],
+                'grade': result['grade'],
+                'version': result['version']
             })
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
     
     return JsonResponse({'success': False, 'error': 'Invalid request'})
 
+@login_required
+@teacher_required
+def save_scores_batch(request):
+    """AJAX endpoint to save many score cells in one request"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request'})
+    
+    try:
+        cells = json.loads(request.body)['cells']
+    except (ValueError, KeyError, TypeError):
+        cells = None
+    if not isinstance(cells, list):
+        return JsonResponse({'success': False, 'error': 'Expected a JSON body with a "cells" list'}, status=400)
+    
+    results = save_score_cells(cells, request.user)
+    return JsonResponse({
+        'success': all(result['status'] == 'saved' for result in results),
+        'results': results
+    })
+
 @login_required
 @teacher_required
 def approve_scores(request, class_id, subject_id):
@@ -380,45 +398,110 @@ def approve_scores(request, class_id, subject_id):
     class_obj = get_object_or_404(Class, id=class_id)
     subject = get_object_or_404(Subject, id=subject_id)
     
+    # Get current term
+    current_term = Term.objects.filter(is_current=True).first()
+    
+    # Scores this page can act on
+    scores = Score.objects.filter(
+        student__current_class=class_obj,
+        subject_assessment__subject=subject,
+        subject_assessment__term=current_term.term if current_term else None,
+        subject_assessment__academic_year__is_current=True
+    )
+    
+    if request.method == 'POST' and 'action' in request.POST:
+        # Approve or reject individual or selected rows
+        action = {
+            'approve': Score.ApprovalStatus.APPROVED,
+            'reject': Score.ApprovalStatus.REJECTED,
+        }.get(request.POST['action'])
+        try:
+            if 'selected_scores' in request.POST:
+                score_ids = [int(pk) for pk in json.loads(request.POST['selected_scores'])]
+            else:
+                score_ids = [int(request.POST['score_id'])]
+        except (KeyError, TypeError, ValueError):
+            score_ids = None
+        if action is None or not score_ids:
+            return JsonResponse({'success': False, 'error': 'Invalid request'}, status=400)
+        
+        updated = apply_score_approval(
+            scores.filter(id__in=score_ids), action, request.user,
+            notes=request.POST.get('notes', '')
+        )
+        return JsonResponse({'success': True, 'updated': updated})
+    
     if request.method == 'POST':
         form = ScoreApprovalForm(request.POST)
         if form.is_valid():
             approve_all = form.cleaned_data['approve_all']
             
-            # Get current term
-            current_term = Term.objects.filter(is_current=True).first()
-            
-            # Get scores to approve
-            scores = Score.objects.filter(
-                student__current_class=class_obj,
-                subject_assessment__subject=subject,
-                subject_assessment__term=current_term.term if current_term else None,
-                subject_assessment__academic_year__is_current=True
-            )
-            
             if approve_all:
-                scores.update(
-                    is_approved=True,
-                    approved_by=request.user,
-                    approved_at=timezone.now()
+                updated = apply_score_approval(
+                    scores, Score.ApprovalStatus.APPROVED, request.user,
+                    notes=form.cleaned_data['notes']
                 )
-                messages.success(request, f"All scores approved successfully.")
+                messages.success(request, f"{updated} scores approved successfully.")
             else:
-                # Individual approval would be handled differently
-                messages.info(request, "Individual approval not implemented in this view.")
+                messages.info(request, "Select the scores to approve or reject.")
             
             return redirect('academics:edit_scores', class_id=class_obj.id, subject_id=subject.id)
     else:
         form = ScoreApprovalForm()
     
+    scores = list(scores.select_related(
+        'student__user', 'subject_assessment__subject', 'subject_assessment__assessment'
+    ))
+    status_counts = Counter(s.status for s in scores)
     context = {
         'form': form,
         'class_obj': class_obj,
         'subject': subject,
+        'scores': scores,
+        'pending_count': status_counts[Score.ApprovalStatus.PENDING],
+        'approved_count': status_counts[Score.ApprovalStatus.APPROVED],
+        'rejected_count': status_counts[Score.ApprovalStatus.REJECTED],
+        'assessments': sorted({s.subject_assessment.assessment for s in scores}, key=lambda a: a.name),
         'title': 'Approve Scores'
     }
     return render(request, 'academics/teacher/approve_scores.html', context)
 
+@login_required
+@admin_required
+def score_approval_api(request):
+    """API endpoint to approve or reject scores across classes in bulk"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request'})
+    
+    try:
+        data = json.loads(request.body)
+        action = {
+            'approve': Score.ApprovalStatus.APPROVED,
+            'reject': Score.ApprovalStatus.REJECTED,
+        }[data['action']]
+        if 'score_ids' in data:
+            scores = [int(pk) for pk in data['score_ids']]
+        else:
+            filters = data['filter']
+            scores = Score.objects.filter(
+                subject_assessment__term=filters['term'],
+                subject_assessment__academic_year_id=filters['academic_year']
+            )
+            if filters.get('class_ids'):
+                scores = scores.filter(student__current_class_id__in=filters['class_ids'])
+            if filters.get('subject_ids'):
+                scores = scores.filter(subject_assessment__subject_id__in=filters['subject_ids'])
+            if filters.get('status'):
+                scores = scores.filter(status=filters['status'])
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({
+            'success': False,
+            'error': 'Expected "action" and either "score_ids" or a "filter" with term and academic_year'
+        }, status=400)
+    
+    updated = apply_score_approval(scores, action, request.user, notes=data.get('notes', ''))
+    return JsonResponse({'success': True, 'updated': updated})
+
 # Report Card Views
 @login_required
 @teacher_required
@@ -438,24 +521,19 @@ def generate_report_cards(request):
                 return redirect('academics:report_cards')
             
             if generate_for_all:
-                students = Student.objects.filter(
-                    current_class=class_assigned,
-                    enrollment_status='ACTIVE'
-                )
+                students = None
             else:
                 students = form.cleaned_data.get('students', [])
             
-            generated_count = 0
-            for student in students:
-                try:
-                    report_card = generate_student_report_card(
-                        student, class_assigned, term, academic_year, request.user
-                    )
-                    generated_count += 1
-                except Exception as e:
-                    messages.error(request, f"Error generating report for {student.user.get_full_name()}: {str(e)}")
-            
-            messages.success(request, f"{generated_count} report cards generated successfully.")
+            try:
+                report_cards = generate_class_report_cards(
+                    class_assigned, term, academic_year, request.user,
+                    students=students
+                )
+            except Exception as e:
+                messages.error(request, f"Error generating report cards for {class_assigned.name}: {str(e)}")
+            else:
+                messages.success(request, f"{report_cards.count()} report cards generated successfully.")
             return redirect('academics:report_card_list', class_id=class_assigned.id)
     else:
         form = ReportCardGenerationForm()
@@ -468,139 +546,13 @@ def generate_report_cards(request):
 
 def generate_student_report_card(student, class_assigned, term, academic_year, generated_by):
     """Helper function to generate a single report card"""
-    # Get all subjects for this class
-    subjects = Subject.objects.filter(class_level=class_assigned.class_level)
-    
-    subject_scores = {}
-    subject_grades = {}
-    total_score = 0
-    subject_count = 0
-    
-    for subject in subjects:
-        # Get all scores for this student in this subject for the term
-        scores = Score.objects.filter(
-            student=student,
-            subject_assessment__subject=subject,
-            subject_assessment__term=term,
-            subject_assessment__academic_year=academic_year
-        )
-        
-        if scores.exists():
-            # Calculate weighted total
-            subject_total = 0
-            for score in scores:
-                weighted = (score.score / score.subject_assessment.max_score) * score.subject_assessment.assessment.weight_percentage
-                subject_total += weighted
-            
-            subject_scores[subject.name] = round(subject_total, 2)
-            subject_grades[subject.name] = calculate_grade(subject_total)
-            total_score += subject_total
-            subject_count += 1
-    
-    # Calculate average
-    average_score = total_score / subject_count if subject_count > 0 else 0
-    
-    # Calculate position (simplified - you'd need to compare with all students in class)
-    position = calculate_position(student, class_assigned, term, academic_year)
-    
-    # Get attendance summary
-    attendance_summary = get_attendance_summary(student, term, academic_year)
-    
-    # Create or update report card
-    report_card, created = ReportCard.objects.update_or_create(
-        student=student,
-        term=term,
-        academic_year=academic_year,
-        defaults={
-            'class_assigned': class_assigned,
-            'subject_scores': subject_scores,
-            'subject_grades': subject_grades,
-            'total_score': total_score,
-            'average_score': average_score,
-            'position': position,
-            'total_students': Student.objects.filter(
-                current_class=class_assigned,
-                enrollment_status='ACTIVE'
-            ).count(),
-            'total_school_days': attendance_summary['total_days'],
-            'days_present': attendance_summary['present_days'],
-            'days_absent': attendance_summary['absent_days'],
-            'generated_by': generated_by
-        }
-    )
-    
-    return report_card
-
-def calculate_grade(score):
-    """Calculate grade based on score"""
-    if score >= 70:
-        return 'A'
-    elif score >= 60:
-        return 'B'
-    elif score >= 50:
-        return 'C'
-    elif score >= 45:
-        return 'D'
-    elif score >= 40:
-        return 'E'
-    else:
-        return 'F'
+    return generate_class_report_cards(
+        class_assigned, term, academic_year, generated_by, students=[student]
+    ).get()
 
 def calculate_position(student, class_assigned, term, academic_year):
     """Calculate student's position in class"""
-    # Get all students in class
-    students = Student.objects.filter(
-        current_class=class_assigned,
-        enrollment_status='ACTIVE'
-    )
-    
-    # Get or calculate averages for all students
-    averages = {}
-    for s in students:
-        # Get all scores for this student
-        scores = Score.objects.filter(
-            student=s,
-            subject_assessment__term=term,
-            subject_assessment__academic_year=academic_year
-        )
-        
-        if scores.exists():
-            total = 0
-            count = 0
-            for score in scores:
-                weighted = (score.score / score.subject_assessment.max_score) * score.subject_assessment.assessment.weight_percentage
-                total += weighted
-                count += 1
-            avg = total / count if count > 0 else 0
-            averages[s.id] = avg
-    
-    # Sort by average
-    sorted_students = sorted(averages.items(), key=lambda x: x[1], reverse=True)
-    
-    # Find position
-    for idx, (student_id, _) in enumerate(sorted_students, 1):
-        if student_id == student.id:
-            return idx
-    
-    return None
-
-def get_attendance_summary(student, term, academic_year):
-    """Get attendance summary for student"""
-    attendance = Attendance.objects.filter(
-        student=student,
-        session__term=term,
-        session__academic_year=academic_year
-    )
-    
-    total_days = attendance.count()
-    present_days = attendance.filter(status='P').count()
-    absent_days = attendance.filter(status='A').count()
-    
-    return {
-        'total_days': total_days,
-        'present_days': present_days,
-        'absent_days': absent_days
-    }
+    return student_position(student, class_assigned, term, academic_year)
 
 @login_required
 def report_card_list(request, class_id=None):
@@ -654,27 +606,80 @@ def view_report_card(request, pk):
 @login_required
 def download_report_card_pdf(request, pk):
     """Download report card as PDF"""
-    report_card = get_object_or_404(ReportCard, pk=pk)
+    report_card = get_object_or_404(
+        ReportCard.objects.select_related('student__user', 'academic_year'), pk=pk
+    )
     
     # Check permission (same as view)
     # ... permission checks ...
     
-    # Render HTML
-    html_string = render_to_string('academics/pdf/report_card_pdf.html', {
-        'report_card': report_card,
-        'school': SchoolProfile.objects.first()
-    })
-    
-    # Generate PDF
-    html = HTML(string=html_string)
-    result = html.write_pdf()
-    
-    # Create response
-    response = HttpResponse(result, content_type='application/pdf')
-    filename = f"report_card_{report_card.student.admission_number}_{report_card.term}_{report_card.academic_year}.pdf"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    
-    return response
+    # Only the stored PDF is served; a missing or stale one is queued for
+    # rendering in the background
+    pdf_file = stored_report_card_pdf(report_card)
+    if pdf_file is None:
+        queue_report_card_pdfs([report_card.pk], base_url=request.build_absolute_uri('/'))
+        messages.info(request, "The PDF is being prepared. Please try again in a moment.")
+        return redirect('academics:report_card_detail', pk=report_card.pk)
+    
+    return FileResponse(
+        pdf_file.open('rb'),
+        as_attachment=True,
+        filename=report_card_filename(report_card),
+        content_type='application/pdf'
+    )
+
+@login_required
+def download_class_report_cards(request, class_id):
+    """Download all report cards of a class as one merged PDF or a ZIP"""
+    class_obj = get_object_or_404(Class, id=class_id)
+
+    # Check permission (same as report card list)
+    if class_obj.class_teacher != request.user and request.user.role not in ['SUPER_ADMIN', 'ADMIN', 'PRINCIPAL']:
+        messages.error(request, "You are not authorized to view these report cards.")
+        return redirect('dashboard:home')
+
+    term = request.GET.get('term')
+    academic_year_id = request.GET.get('academic_year')
+    if not term or not academic_year_id:
+        current_term = Term.objects.filter(is_current=True).first()
+        if not current_term:
+            messages.error(request, "No current term set. Please specify a term.")
+            return redirect('academics:report_card_list', class_id=class_id)
+        term = term or current_term.term
+        academic_year_id = academic_year_id or current_term.academic_year_id
+    academic_year = get_object_or_404(AcademicYear, id=academic_year_id)
+
+    report_cards = ReportCard.objects.filter(
+        class_assigned=class_obj,
+        term=term,
+        academic_year=academic_year
+    )
+    if not report_cards.exists():
+        messages.error(request, "No report cards found for the selected term.")
+        return redirect('academics:report_card_list', class_id=class_id)
+
+    base_url = request.build_absolute_uri('/')
+    filename = f"report_cards_{class_obj.name}_{term}_{academic_year}".replace('/', '-').replace(' ', '_')
+
+    if request.GET.get('format') == 'zip':
+        response = StreamingHttpResponse(
+            stream_report_cards_zip(report_cards, base_url=base_url),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}.zip"'
+        return response
+
+    # The merged document is built from the stored PDFs, then spooled to
+    # disk and streamed from there
+    output = tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+    write_merged_report_cards_pdf(report_cards, output, base_url=base_url)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f"{filename}.pdf",
+        content_type='application/pdf'
+    )
 
 @login_required
 @admin_required
@@ -695,6 +700,7 @@ def approve_report_cards(request, class_id):
                 is_approved=False
             )
             
+            approved = []
             for report_card in report_cards:
                 if class_teacher_comment:
                     report_card.class_teacher_comment = class_teacher_comment
@@ -704,9 +710,12 @@ def approve_report_cards(request, class_id):
                     report_card.is_approved = True
                     report_card.approved_by = request.user
                     report_card.approved_at = timezone.now()
+                    approved.append(report_card.pk)
                 report_card.save()
             
-            messages.success(request, f"{report_cards.count()} report cards approved successfully.")
+            # PDFs are rendered in the background once the approvals commit
+            queue_report_card_pdfs(approved, base_url=request.build_absolute_uri('/'))
+            messages.success(request, f"{len(approved)} report cards approved successfully.")
             return redirect('academics:report_card_list', class_id=class_obj.id)
     else:
         form = ReportCardApprovalForm()
@@ -746,63 +755,6 @@ def class_performance(request):
     }
     return render(request, 'academics/principal/class_performance.html', context)
 
-def calculate_class_performance(class_assigned, term, academic_year):
-    """Calculate performance metrics for a class"""
-    students = Student.objects.filter(
-        current_class=class_assigned,
-        enrollment_status='ACTIVE'
-    )
-    
-    subjects = Subject.objects.filter(class_level=class_assigned.class_level)
-    
-    subject_averages = {}
-    all_averages = []
-    
-    for subject in subjects:
-        scores = Score.objects.filter(
-            student__in=students,
-            subject_assessment__subject=subject,
-            subject_assessment__term=term,
-            subject_assessment__academic_year=academic_year
-        )
-        
-        if scores.exists():
-            # Calculate weighted averages per student
-            student_totals = {}
-            for score in scores:
-                if score.student_id not in student_totals:
-                    student_totals[score.student_id] = 0
-                weighted = (score.score / score.subject_assessment.max_score) * score.subject_assessment.assessment.weight_percentage
-                student_totals[score.student_id] += weighted
-            
-            avg = sum(student_totals.values()) / len(student_totals) if student_totals else 0
-            subject_averages[subject.name] = round(avg, 2)
-            
-            # Collect all averages for overall class average
-            all_averages.extend(student_totals.values())
-    
-    class_average = sum(all_averages) / len(all_averages) if all_averages else 0
-    highest_score = max(all_averages) if all_averages else 0
-    lowest_score = min(all_averages) if all_averages else 0
-    pass_rate = len([a for a in all_averages if a >= 50]) / len(all_averages) * 100 if all_averages else 0
-    
-    # Save or update class performance
-    performance, created = ClassPerformance.objects.update_or_create(
-        class_assigned=class_assigned,
-        term=term,
-        academic_year=academic_year,
-        defaults={
-            'total_students': students.count(),
-            'subject_averages': subject_averages,
-            'class_average': class_average,
-            'highest_score': highest_score,
-            'lowest_score': lowest_score,
-            'pass_rate': pass_rate
-        }
-    )
-    
-    return performance
-
 @login_required
 @admin_required
 def class_performance_detail(request, class_id, term, year_id):
@@ -824,32 +776,17 @@ def class_performance_detail(request, class_id, term, year_id):
     students = Student.objects.filter(
         current_class=class_assigned,
         enrollment_status='ACTIVE'
-    ).select_related('user')
+    ).select_related('user').in_bulk()
     
     rankings = []
-    for student in students:
-        # Calculate student average
-        scores = Score.objects.filter(
-            student=student,
-            subject_assessment__term=term,
-            subject_assessment__academic_year=academic_year
-        )
-        
-        if scores.exists():
-            total = 0
-            count = 0
-            for score in scores:
-                weighted = (score.score / score.subject_assessment.max_score) * score.subject_assessment.assessment.weight_percentage
-                total += weighted
-                count += 1
-            avg = total / count
+    for row in rank_students(term, academic_year, class_assigned=class_assigned):
+        if row['student_id'] in students:
             rankings.append({
-                'student': student,
-                'average': avg
+                'student': students[row['student_id']],
+                'average': row['average'],
+                'position': row['position']
             })
     
-    rankings.sort(key=lambda x: x['average'], reverse=True)
-    
     context = {
         'performance': performance,
         'class_assigned': class_assigned,
@@ -898,11 +835,39 @@ def student_performance(request, student_id=None):
         'report_cards': report_cards,
         'current_scores': current_scores,
         'current_term': current_term,
+        'timeline': student_timeline(student),
         'title': f'Performance - {student.user.get_full_name()}'
     }
     return render(request, 'academics/student/performance.html', context)
 
 # API Views
+@login_required
+def student_timeline_api(request, student_id):
+    """API endpoint for a student's term-by-term performance history"""
+    student = get_object_or_404(Student.objects.select_related('user'), id=student_id)
+    
+    # Check permission (same as report cards)
+    user = request.user
+    allowed = True
+    if user.role == 'STUDENT':
+        allowed = student.user_id == user.id
+    elif user.role == 'PARENT':
+        allowed = user.parent_profile.children.filter(id=student.id).exists()
+    elif user.role == 'TEACHER':
+        allowed = Class.objects.filter(
+            Q(class_teacher=user) | Q(subject_allocations__teacher=user),
+            id=student.current_class_id
+        ).exists()
+    if not allowed:
+        return JsonResponse({'success': False, 'error': "You don't have permission to view this student."}, status=403)
+    
+    return JsonResponse({
+        'success': True,
+        'student_id': student.id,
+        'student_name': student.user.get_full_name(),
+        'timeline': student_timeline(student)
+    })
+
 @login_required
 def get_assessments_for_subject(request):
     """API endpoint to get assessments for a subject"""
@@ -917,37 +882,56 @@ def get_assessments_for_subject(request):
         return JsonResponse(list(assessments), safe=False)
     return JsonResponse([], safe=False)
 
+def get_students_with_scores_version(request):
+    """Version of the requested students-with-scores payload, computed once per request"""
+    if not hasattr(request, '_students_with_scores_version'):
+        assessment_id = request.GET.get('assessment_id')
+        class_id = request.GET.get('class_id')
+        if assessment_id and class_id:
+            version = students_with_scores_version(class_id, assessment_id)
+        else:
+            version = (None, None)
+        request._students_with_scores_version = version
+    return request._students_with_scores_version
+
 @login_required
+@condition(
+    etag_func=lambda request: get_students_with_scores_version(request)[1],
+    last_modified_func=lambda request: get_students_with_scores_version(request)[0]
+)
 def get_students_with_scores(request):
     """API endpoint to get students with existing scores for an assessment"""
     assessment_id = request.GET.get('assessment_id')
     class_id = request.GET.get('class_id')
     
     if assessment_id and class_id:
-        students = Student.objects.filter(
-            current_class_id=class_id,
-            enrollment_status='ACTIVE'
-        ).select_related('user')
-        
-        data = []
-        for student in students:
-            score = Score.objects.filter(
-                student=student,
-                subject_assessment_id=assessment_id
-            ).first()
-            
-            data.append({
-                'student_id': student.id,
-                'student_name': student.user.get_full_name(),
-                'admission_number': student.admission_number,
-                'score_id': score.id if score else None,
-                'score': float(score.score) if score else None
-            })
-        
-        return JsonResponse(data, safe=False)
+        response = JsonResponse(students_with_scores(class_id, assessment_id))
+        # Polling clients must revalidate, which is answered with a 304
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
     
     return JsonResponse([], safe=False)
 
+@login_required
+@admin_required
+def performance_analytics(request):
+    """API endpoint for cross-class performance analytics from the cube"""
+    group_by = [g for g in request.GET.get('group_by', 'class,subject').split(',') if g]
+    filters = {
+        'academic_year': request.GET.get('academic_year') or None,
+        'term': request.GET.get('term') or None,
+        'class_assigned': request.GET.get('class_id') or None,
+        'subject': request.GET.get('subject_id') or None,
+        'class_level': request.GET.get('class_level') or None,
+    }
+
+    try:
+        results = performance_summary(group_by=group_by, **filters)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
+
+    return JsonResponse({'success': True, 'results': results})
+
 @login_required
 def academic_calendar(request):
     """Display the academic calendar for the school"""
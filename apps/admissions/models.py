@@ -2,7 +2,7 @@ from django.db import models
 from django.core.validators import EmailValidator
 from apps.classes.models import ClassLevel
 from apps.accounts.models import User
-from django.utils import timezone
+from apps.school.sequences import next_number
 
 
 class Application(models.Model):
@@ -98,18 +98,8 @@ class Application(models.Model):
     def save(self, *args, **kwargs):
         if not self.application_number:
             # Generate application number (e.g., APP20240001)
-            year = timezone.now().year
-            last_app = Application.objects.filter(
-                application_number__startswith=f"APP{year}"
-            ).order_by('application_number').last()
-
-            if last_app:
-                last_number = int(last_app.application_number[-4:])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-
-            self.application_number = f"APP{year}{new_number:04d}"
+            self.application_number = next_number(
+                'APP', 4, existing=(Application.objects.all(), 'application_number'))
 
         super().save(*args, **kwargs)
 
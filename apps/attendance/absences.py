@@ -0,0 +1,171 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (
+    AttendanceSession, Attendance, AttendanceStrip, AttendanceWatermark, AbsenceAlert
+)
+from .strips import absence_streaks, attendance_rate
+from apps.announcements.models import Notification
+from apps.parents.models import ParentStudentRelationship
+from apps.students.models import Student
+
+
+WATERMARK = 'chronic_absence'
+
+# Attendance percentage below which a student is flagged
+DEFAULT_RATE_THRESHOLD = 75
+# Consecutive absent school days that raise an alert
+DEFAULT_STREAK_LENGTH = 3
+# Session days needed before a percentage is meaningful
+MIN_SESSION_DAYS = 5
+
+
+def sessions_after(watermark):
+    """Closed sessions past the watermark, in processing order"""
+    sessions = AttendanceSession.objects.filter(is_closed=True, closed_at__isnull=False)
+    if watermark.closed_at:
+        sessions = sessions.filter(
+            Q(closed_at__gt=watermark.closed_at) |
+            Q(closed_at=watermark.closed_at, id__gt=watermark.session_id)
+        )
+    return sessions.order_by('closed_at', 'id')
+
+
+def evaluate_strip(strip, rate_threshold, streak_length):
+    """The alert kinds a strip currently meets, with their values"""
+    conditions = {}
+    days = bytes(strip.days)
+    session_days = len(days) - days.count(b'-')
+    rate = attendance_rate(strip)
+    if rate is not None and session_days >= MIN_SESSION_DAYS and rate < rate_threshold:
+        conditions[AbsenceAlert.Kind.LOW_ATTENDANCE] = Decimal(str(round(rate, 2)))
+    current, _ = absence_streaks(strip)
+    if current >= streak_length:
+        conditions[AbsenceAlert.Kind.ABSENCE_STREAK] = Decimal(current)
+    return conditions
+
+
+def alert_message(student, alert):
+    name = student.user.get_full_name()
+    if alert.kind == AbsenceAlert.Kind.LOW_ATTENDANCE:
+        return (
+            f"Chronic absence: {name}",
+            f"{name}'s attendance this term has dropped to {alert.value}%."
+        )
+    return (
+        f"Consecutive absences: {name}",
+        f"{name} has been absent for {int(alert.value)} consecutive school days."
+    )
+
+
+def alert_recipients(student_ids):
+    """{student_id: recipient user ids}: class teachers and linked parents"""
+    recipients = defaultdict(set)
+    for student_id, teacher_id in Student.objects.filter(
+        id__in=student_ids, current_class__class_teacher__isnull=False
+    ).values_list('id', 'current_class__class_teacher_id'):
+        recipients[student_id].add(teacher_id)
+    for student_id, user_id in ParentStudentRelationship.objects.filter(
+        student_id__in=student_ids, receives_notifications=True
+    ).values_list('student_id', 'parent__user_id'):
+        recipients[student_id].add(user_id)
+    return recipients
+
+
+def scan_chronic_absence(rate_threshold=DEFAULT_RATE_THRESHOLD,
+                         streak_length=DEFAULT_STREAK_LENGTH, batch_size=200):
+    """
+    Raise and clear chronic-absence alerts for newly closed sessions.
+
+    Sessions are read past the stored watermark in batches. Only the
+    students in those sessions are re-evaluated, from their attendance
+    strips: an alert is raised when a condition starts to hold and cleared
+    once it stops, so a student is notified once per episode. New alerts
+    are sent to class teachers and linked parents as one bulk insert of
+    notifications per batch, and the watermark moves forward in the same
+    transaction.
+
+    Returns (sessions processed, alerts raised, alerts cleared).
+    """
+    watermark, _ = AttendanceWatermark.objects.get_or_create(name=WATERMARK)
+    processed = raised = cleared = 0
+
+    while True:
+        batch = list(sessions_after(watermark).values_list(
+            'id', 'closed_at', 'term', 'academic_year_id')[:batch_size])
+        if not batch:
+            break
+
+        periods = defaultdict(set)
+        session_periods = {row[0]: (row[2], row[3]) for row in batch}
+        for session_id, student_id in Attendance.objects.filter(
+            session_id__in=session_periods
+        ).values_list('session_id', 'student_id'):
+            periods[session_periods[session_id]].add(student_id)
+
+        with transaction.atomic():
+            new_alerts = []
+            now = timezone.now()
+            for (term, academic_year_id), student_ids in periods.items():
+                strips = AttendanceStrip.objects.filter(
+                    student_id__in=student_ids, term=term, academic_year_id=academic_year_id)
+                active = {
+                    (alert.student_id, alert.kind): alert
+                    for alert in AbsenceAlert.objects.filter(
+                        student_id__in=student_ids, term=term,
+                        academic_year_id=academic_year_id, is_active=True)
+                }
+                resolved = []
+                for strip in strips:
+                    conditions = evaluate_strip(strip, rate_threshold, streak_length)
+                    for kind in AbsenceAlert.Kind.values:
+                        alert = active.get((strip.student_id, kind))
+                        if kind in conditions and alert is None:
+                            new_alerts.append(AbsenceAlert(
+                                student_id=strip.student_id, term=term,
+                                academic_year_id=academic_year_id,
+                                kind=kind, value=conditions[kind]))
+                        elif kind not in conditions and alert is not None:
+                            resolved.append(alert.id)
+                cleared += AbsenceAlert.objects.filter(id__in=resolved).update(
+                    is_active=False, resolved_at=now)
+
+            AbsenceAlert.objects.bulk_create(new_alerts)
+            raised += len(new_alerts)
+            notify_absence_alerts(new_alerts)
+
+            last_id, last_closed_at = batch[-1][0], batch[-1][1]
+            watermark.closed_at = last_closed_at
+            watermark.session_id = last_id
+            watermark.save()
+        processed += len(batch)
+
+    return processed, raised, cleared
+
+
+def notify_absence_alerts(alerts):
+    """Create the notifications for new alerts with one bulk insert"""
+    if not alerts:
+        return 0
+    student_ids = {alert.student_id for alert in alerts}
+    students = Student.objects.select_related('user').in_bulk(student_ids)
+    recipients = alert_recipients(student_ids)
+
+    notifications = []
+    for alert in alerts:
+        title, message = alert_message(students[alert.student_id], alert)
+        notifications.extend(
+            Notification(
+                notification_type=Notification.NotificationType.ATTENDANCE,
+                title=title,
+                message=message,
+                recipient_id=user_id,
+            )
+            for user_id in sorted(recipients[alert.student_id])
+        )
+    Notification.objects.bulk_create(notifications)
+    return len(notifications)
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import AttendanceSession, Attendance, AttendanceSummary
+from .models import (
+    AttendanceSession, Attendance, AttendanceSummary, AttendanceStrip,
+    AttendanceWatermark, AbsenceAlert, ClassAttendanceDay
+)
 
 
 @admin.register(AttendanceSession)
@@ -32,3 +35,46 @@ class AttendanceSummaryAdmin(admin.ModelAdmin):
         'term',
         'academic_year',
         'attendance_percentage')
+
+
+@admin.register(AttendanceStrip)
+class AttendanceStripAdmin(admin.ModelAdmin):
+    list_display = (
+        'student',
+        'term',
+        'academic_year',
+        'start_date',
+        'updated_at')
+    list_filter = ('term', 'academic_year')
+    readonly_fields = ('days',)
+
+
+@admin.register(AttendanceWatermark)
+class AttendanceWatermarkAdmin(admin.ModelAdmin):
+    list_display = ('name', 'closed_at', 'session_id', 'updated_at')
+
+
+@admin.register(AbsenceAlert)
+class AbsenceAlertAdmin(admin.ModelAdmin):
+    list_display = (
+        'student',
+        'term',
+        'academic_year',
+        'kind',
+        'value',
+        'is_active',
+        'raised_at')
+    list_filter = ('kind', 'is_active', 'term', 'academic_year')
+
+
+@admin.register(ClassAttendanceDay)
+class ClassAttendanceDayAdmin(admin.ModelAdmin):
+    list_display = (
+        'class_assigned',
+        'date',
+        'total',
+        'present',
+        'absent',
+        'late',
+        'attendance_rate')
+    list_filter = ('term', 'academic_year', 'class_assigned')
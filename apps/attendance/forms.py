@@ -98,6 +98,8 @@ class AttendanceReportForm(forms.Form):
     """Form for generating attendance reports"""
     class_assigned = forms.ModelChoiceField(
         queryset=Class.objects.filter(status='ACTIVE'),
+        required=False,
+        empty_label='All classes',
         widget=forms.Select(attrs={'class': 'form-control'})
     )
     term = forms.ChoiceField(
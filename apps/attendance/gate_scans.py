@@ -0,0 +1,171 @@
+import csv
+import json
+from collections import defaultdict
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .lateness import minutes_late_many, school_opening
+from .models import AttendanceSession, Attendance
+from .sessions import current_term, open_attendance_sessions
+from apps.classes.models import Class
+from apps.students.models import Student
+
+
+SCAN_FIELDS = ['status', 'time_in', 'minutes_late']
+
+
+def json_record(line):
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return {}
+    return record if isinstance(record, dict) else {}
+
+
+def read_scans(lines, format='csv'):
+    """
+    Yield (admission_number, datetime) pairs from a scanner log.
+
+    CSV logs need a header with ``admission_number`` and ``timestamp``
+    columns; JSONL logs hold one object with the same keys per line.
+    Unreadable entries are yielded with a ``None`` timestamp.
+    """
+    if format == 'jsonl':
+        records = (json_record(line) for line in lines if line.strip())
+    else:
+        records = csv.DictReader(lines)
+    for record in records:
+        admission_number = str(record.get('admission_number') or '').strip()
+        try:
+            scanned_at = parse_datetime(str(record.get('timestamp') or '').strip())
+        except ValueError:
+            scanned_at = None
+        if scanned_at is not None and timezone.is_aware(scanned_at):
+            scanned_at = timezone.localtime(scanned_at)
+        yield admission_number, scanned_at
+
+
+def earliest_scans(scans):
+    """
+    Reduce a scan stream to each student's first entry per day.
+
+    Returns ({date: {admission_number: time}}, number of scans read,
+    number of unreadable scans) without holding the whole log in memory.
+    """
+    first = defaultdict(dict)
+    read = invalid = 0
+    for admission_number, scanned_at in scans:
+        read += 1
+        if not admission_number or scanned_at is None:
+            invalid += 1
+            continue
+        day = first[scanned_at.date()]
+        scanned = scanned_at.time().replace(microsecond=0)
+        if admission_number not in day or scanned < day[admission_number]:
+            day[admission_number] = scanned
+    return first, read, invalid
+
+
+def apply_day_scans(date, times_in, taken_by, term, half_day=False):
+    """
+    Record one day's gate entries on the attendance rows.
+
+    ``times_in`` maps admission numbers to the first entry time. Sessions
+    still missing for the students' classes are opened, with every student
+    who did not scan in marked Absent. Then every matched row gets its time
+    in, a Present or Late status and the minutes late against the day's
+    opening time, computed for the whole batch at once and written with
+    one bulk update. Rows of closed sessions and holiday
+    rows are left alone.
+
+    Returns a dict of counts: matched, unknown, updated, absent and closed.
+    """
+    students = dict(Student.objects.filter(
+        admission_number__in=times_in, enrollment_status='ACTIVE'
+    ).values_list('admission_number', 'id'))
+    stats = {'matched': len(students), 'unknown': len(times_in) - len(students),
+             'updated': 0, 'absent': 0, 'closed': 0}
+    if not students:
+        return stats
+
+    with transaction.atomic():
+        class_ids = set(Student.objects.filter(
+            id__in=students.values(), current_class__isnull=False
+        ).values_list('current_class_id', flat=True))
+        opened = open_attendance_sessions(
+            Class.objects.filter(id__in=class_ids), date, taken_by, term=term)
+        # Sessions opened here are pre-filled Present; the log is the only
+        # record of who came in, so students without a scan were absent
+        if opened:
+            stats['absent'] = Attendance.objects.filter(
+                session__in=opened
+            ).exclude(
+                student_id__in=students.values()
+            ).update(status=Attendance.Status.ABSENT)
+
+        rows = list(Attendance.objects.filter(
+            session__date=date,
+            session__term=term.term,
+            session__academic_year_id=term.academic_year_id,
+            student_id__in=students.values()
+        ).select_related('session').only(
+            'id', 'student_id', 'session_id', 'status', 'time_in', 'minutes_late',
+            'session__is_closed'
+        ))
+        admission_numbers = {student_id: number for number, student_id in students.items()}
+        open_rows = []
+        for row in rows:
+            if row.session.is_closed:
+                stats['closed'] += 1
+            elif row.status != Attendance.Status.HOLIDAY:
+                open_rows.append(row)
+
+        times = [
+            min(filter(None, (row.time_in, times_in[admission_numbers[row.student_id]])))
+            for row in open_rows
+        ]
+        lateness = minutes_late_many(times, school_opening(half_day=half_day))
+        changed = []
+        for row, time_in, minutes in zip(open_rows, times, lateness):
+            status = Attendance.Status.LATE if minutes else Attendance.Status.PRESENT
+            if (row.status, row.time_in, row.minutes_late) != (status, time_in, minutes):
+                row.status, row.time_in, row.minutes_late = status, time_in, minutes
+                changed.append(row)
+
+        if changed:
+            Attendance.objects.bulk_update(changed, SCAN_FIELDS, batch_size=1000)
+            AttendanceSession.objects.filter(
+                id__in={row.session_id for row in changed}
+            ).update(last_updated=timezone.now())
+        stats['updated'] = len(changed)
+    return stats
+
+
+def import_gate_scans(lines, taken_by, format='csv', half_days=(), term=None):
+    """
+    Import a gate scanner log and update each day's attendance.
+
+    ``half_days`` is a collection of dates timed against the half-day
+    opening. Days outside the term's dates are not imported and are
+    counted as ``out_of_term``. Returns a dict of totals over every day in
+    the log.
+    """
+    term = term or current_term()
+    if term is None:
+        raise ValueError("No current term is set.")
+
+    days, read, invalid = earliest_scans(read_scans(lines, format=format))
+    half_days = set(half_days)
+    totals = {'scans': read, 'invalid': invalid, 'days': len(days), 'out_of_term': 0,
+              'matched': 0, 'unknown': 0, 'updated': 0, 'absent': 0, 'closed': 0}
+    for date in sorted(days):
+        if not term.start_date <= date <= term.end_date:
+            totals['out_of_term'] += 1
+            continue
+        stats = apply_day_scans(
+            date, days[date], taken_by, term, half_day=date in half_days)
+        for key, value in stats.items():
+            totals[key] += value
+    return totals
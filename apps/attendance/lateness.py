@@ -0,0 +1,35 @@
+import datetime
+
+from apps.school.models import SchoolProfile
+
+
+# Opening time used when no school profile has been set up
+DEFAULT_OPENING_TIME = datetime.time(8, 0)
+
+
+def school_opening(half_day=False):
+    """Opening time from the school profile, using the half-day opening on half days"""
+    school = SchoolProfile.objects.only('opening_time', 'half_day_opening').first()
+    if school is None:
+        return DEFAULT_OPENING_TIME
+    if half_day and school.half_day_opening:
+        return school.half_day_opening
+    return school.opening_time
+
+
+def seconds(value):
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def minutes_late(time_in, opening):
+    """Whole minutes a time in is past the opening time"""
+    return max(seconds(time_in) - seconds(opening), 0) // 60
+
+
+def minutes_late_many(times_in, opening):
+    """Minutes late for a whole batch of times in, against one opening time"""
+    opening_seconds = seconds(opening)
+    return [
+        max(time_in.hour * 3600 + time_in.minute * 60 + time_in.second - opening_seconds, 0) // 60
+        for time_in in times_in
+    ]
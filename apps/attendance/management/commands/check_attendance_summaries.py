@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.attendance.summaries import find_summary_mismatches, rebuild_attendance_summaries
+from apps.school.models import AcademicYear, SchoolProfile
+
+
+class Command(BaseCommand):
+    help = "Check attendance summaries against a recount of closed attendance sessions"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--academic-year', type=int,
+            help="Only check this academic year (id)")
+        parser.add_argument(
+            '--term', choices=SchoolProfile.TermChoices.values,
+            help="Only check this term")
+        parser.add_argument(
+            '--fix', action='store_true',
+            help="Rebuild the checked summaries when mismatches are found")
+
+    def handle(self, *args, **options):
+        academic_year = None
+        if options['academic_year']:
+            try:
+                academic_year = AcademicYear.objects.get(pk=options['academic_year'])
+            except AcademicYear.DoesNotExist:
+                raise CommandError(f"Academic year {options['academic_year']} does not exist.")
+
+        mismatches = find_summary_mismatches(academic_year=academic_year, term=options['term'])
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("Attendance summaries are consistent."))
+            return
+
+        for (student_id, term, academic_year_id), stored, expected in mismatches:
+            self.stdout.write(
+                f"Student {student_id} {term} (year {academic_year_id}): "
+                f"stored {stored}, expected {expected}"
+            )
+
+        if options['fix']:
+            rebuild_attendance_summaries(academic_year=academic_year, term=options['term'])
+            self.stdout.write(self.style.SUCCESS(f"Fixed {len(mismatches)} attendance summaries."))
+        else:
+            raise CommandError(f"{len(mismatches)} attendance summaries are inconsistent.")
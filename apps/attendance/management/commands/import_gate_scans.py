@@ -0,0 +1,54 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import User
+from apps.attendance.gate_scans import import_gate_scans
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a gate scanner log (CSV or JSONL with admission_number and "
+        "timestamp) and record times in, lateness and presence on attendance."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Scanner log file")
+        parser.add_argument(
+            '--format', choices=['csv', 'jsonl'],
+            help="Log format; defaults to the file extension")
+        parser.add_argument(
+            '--half-day', action='append', default=[], type=datetime.date.fromisoformat,
+            help="A date (YYYY-MM-DD) timed against the half-day opening; repeatable")
+        parser.add_argument(
+            '--taken-by',
+            help="Username recorded on sessions the import opens; defaults to the first superuser")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        log_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+
+        if options['taken_by']:
+            user = User.objects.filter(username=options['taken_by']).first()
+        else:
+            user = User.objects.filter(is_superuser=True, is_active=True).order_by('id').first()
+        if user is None:
+            raise CommandError("No user to record as the session taker.")
+
+        try:
+            with open(path, newline='', encoding='utf-8') as log:
+                totals = import_gate_scans(
+                    log, user, format=log_format, half_days=options['half_day'])
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {totals['scans']} scans over {totals['days']} days "
+            f"({totals['invalid']} unreadable, {totals['out_of_term']} days outside the term): "
+            f"{totals['matched']} students matched, "
+            f"{totals['unknown']} unknown admission numbers, {totals['updated']} rows updated, "
+            f"{totals['absent']} students without a scan marked absent, "
+            f"{totals['closed']} rows in closed sessions skipped."
+        ))
@@ -0,0 +1,65 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.attendance.sessions import current_term, open_attendance_sessions
+from apps.classes.models import Class
+from apps.school.models import Holiday
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-open attendance sessions for every active class on a school day, "
+        "with every active student marked present."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date', type=datetime.date.fromisoformat,
+            help="Date to open sessions for (YYYY-MM-DD); defaults to today")
+        parser.add_argument(
+            '--taken-by',
+            help="Username recorded for classes without a class teacher; "
+                 "defaults to the first superuser")
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Open sessions even on weekends and holidays")
+
+    def handle(self, *args, **options):
+        date = options['date'] or timezone.localdate()
+
+        if not options['force']:
+            if date.weekday() >= 5:
+                self.stdout.write(f"{date} is a weekend; nothing to open.")
+                return
+            holiday = Holiday.objects.filter(start_date__lte=date, end_date__gte=date).first()
+            if holiday:
+                self.stdout.write(f"{date} falls in {holiday.name}; nothing to open.")
+                return
+
+        term = current_term()
+        if term is None:
+            raise CommandError("No current term is set.")
+        if not term.start_date <= date <= term.end_date:
+            raise CommandError(
+                f"{date} is outside the current term "
+                f"({term.start_date} to {term.end_date}).")
+
+        if options['taken_by']:
+            user = User.objects.filter(username=options['taken_by']).first()
+        else:
+            user = User.objects.filter(is_superuser=True, is_active=True).order_by('id').first()
+        if user is None:
+            raise CommandError("No user to record as the session taker.")
+
+        classes = Class.objects.filter(
+            status='ACTIVE', academic_year=term.academic_year
+        ).only('id', 'class_teacher_id')
+        sessions = open_attendance_sessions(
+            classes, date, user, term=term, prefer_class_teacher=True
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Opened {len(sessions)} attendance sessions for {date}."
+        ))
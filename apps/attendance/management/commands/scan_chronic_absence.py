@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from apps.attendance.absences import (
+    DEFAULT_RATE_THRESHOLD, DEFAULT_STREAK_LENGTH, scan_chronic_absence
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Raise chronic-absence alerts for sessions closed since the last run "
+        "and notify class teachers and parents."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold', type=float, default=DEFAULT_RATE_THRESHOLD,
+            help="Attendance percentage below which a student is flagged")
+        parser.add_argument(
+            '--streak', type=int, default=DEFAULT_STREAK_LENGTH,
+            help="Consecutive absent school days that raise an alert")
+
+    def handle(self, *args, **options):
+        processed, raised, cleared = scan_chronic_absence(
+            rate_threshold=options['threshold'],
+            streak_length=options['streak'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {processed} sessions: {raised} alerts raised, {cleared} cleared."
+        ))
@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .lateness import minutes_late, school_opening
+from .models import AttendanceSession, Attendance
+from .rollups import refresh_session_rollups
+from .summaries import apply_summary_deltas, change_deltas
+
+
+MARK_FIELDS = ['status', 'note', 'time_in', 'minutes_late']
+
+
+def apply_mark(attendance, status, note, time_in, opening=None):
+    """
+    Apply a submitted mark to an attendance row; returns True if it changed.
+
+    A late arrival with a time in is timed against ``opening``; without a
+    time in the recorded minutes are kept.
+    """
+    minutes = attendance.minutes_late
+    if status != Attendance.Status.LATE:
+        minutes = 0
+    elif time_in and opening:
+        minutes = minutes_late(time_in, opening)
+
+    values = {
+        'status': status,
+        'note': note,
+        'time_in': time_in,
+        'minutes_late': minutes,
+    }
+    changed = False
+    for field, value in values.items():
+        if getattr(attendance, field) != value:
+            setattr(attendance, field, value)
+            changed = True
+    return changed
+
+
+def mark_session_attendance(session, attendances, marks):
+    """
+    Write submitted marks for a session's attendance rows.
+
+    ``marks`` maps attendance id to a dict of ``status``, ``note`` and
+    optionally ``time_in`` (left unchanged when missing). Marks are
+    compared against the loaded rows and only the rows that differ are
+    written, with one bulk update; the session's last update time is
+    touched once if anything changed. On a closed session the students'
+    attendance summaries, strips and daily rollup follow the status changes.
+
+    Returns the list of changed attendance rows.
+    """
+    opening = school_opening()
+    changed = []
+    status_changes = []
+    for attendance in attendances:
+        mark = marks.get(attendance.id)
+        if mark is None:
+            continue
+        time_in = mark.get('time_in', attendance.time_in)
+        old_status = attendance.status
+        if apply_mark(attendance, mark['status'], mark['note'], time_in, opening):
+            changed.append(attendance)
+            status_changes.append((attendance.student_id, old_status, attendance.status))
+
+    if changed:
+        with transaction.atomic():
+            Attendance.objects.bulk_update(changed, MARK_FIELDS)
+            AttendanceSession.objects.filter(pk=session.pk).update(
+                last_updated=timezone.now()
+            )
+            if session.is_closed:
+                apply_summary_deltas(change_deltas(session, status_changes))
+                refresh_session_rollups(session, [
+                    student_id for student_id, old_status, new_status in status_changes
+                    if old_status != new_status
+                ])
+    return changed
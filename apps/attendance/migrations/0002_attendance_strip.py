@@ -0,0 +1,62 @@
+# Generated by Django 4.2.30 on 2026-10-17 06:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0001_initial"),
+        ("students", "0001_initial"),
+        ("attendance", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttendanceStrip",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "term",
+                    models.CharField(
+                        choices=[
+                            ("FIRST", "First Term"),
+                            ("SECOND", "Second Term"),
+                            ("THIRD", "Third Term"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("start_date", models.DateField()),
+                ("days", models.BinaryField(default=bytes)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "academic_year",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="school.academicyear",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="attendance_strips",
+                        to="students.student",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("student", "term", "academic_year")},
+            },
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("school", "0001_initial"),
+        ("students", "0001_initial"),
+        ("attendance", "0002_attendance_strip"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttendanceWatermark",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("closed_at", models.DateTimeField(blank=True, null=True)),
+                ("session_id", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="AbsenceAlert",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "term",
+                    models.CharField(
+                        choices=[
+                            ("FIRST", "First Term"),
+                            ("SECOND", "Second Term"),
+                            ("THIRD", "Third Term"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("RATE", "Attendance Below Threshold"),
+                            ("STREAK", "Consecutive Absences"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("value", models.DecimalField(decimal_places=2, max_digits=5)),
+                ("is_active", models.BooleanField(default=True)),
+                ("raised_at", models.DateTimeField(auto_now_add=True)),
+                ("resolved_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "academic_year",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="school.academicyear",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="absence_alerts",
+                        to="students.student",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-raised_at"],
+                "indexes": [
+                    models.Index(
+                        fields=[
+                            "student",
+                            "term",
+                            "academic_year",
+                            "kind",
+                            "is_active",
+                        ],
+                        name="attendance__student_1e9e3b_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.30 on 2026-10-17 07:19
+
+from django.db import migrations
+from django.db.models import Count, Q
+
+# Frozen copy of the summary counter for each attendance status
+STATUS_COUNTERS = {
+    "P": "days_present",
+    "A": "days_absent",
+    "L": "days_late",
+    "E": "days_excused",
+}
+COUNTER_FIELDS = ["total_days", *STATUS_COUNTERS.values()]
+
+
+def backfill_attendance_summaries(apps, schema_editor):
+    # Summaries are now adjusted by deltas when sessions close, reopen or are
+    # re-marked, so they must start from the counts of sessions closed before
+    # that; otherwise reopening an old session would decrement below zero.
+    Attendance = apps.get_model("attendance", "Attendance")
+    AttendanceSummary = apps.get_model("attendance", "AttendanceSummary")
+
+    rows = (
+        Attendance.objects.filter(session__is_closed=True)
+        .values("student_id", "session__term", "session__academic_year_id")
+        .annotate(
+            total_days=Count("id"),
+            **{
+                counter: Count("id", filter=Q(status=status))
+                for status, counter in STATUS_COUNTERS.items()
+            },
+        )
+        .order_by()
+    )
+    summaries = []
+    found = set()
+    for row in rows:
+        key = (
+            row["student_id"],
+            row["session__term"],
+            row["session__academic_year_id"],
+        )
+        found.add(key)
+        summaries.append(
+            AttendanceSummary(
+                student_id=key[0],
+                term=key[1],
+                academic_year_id=key[2],
+                attendance_percentage=row["days_present"] / row["total_days"] * 100,
+                **{field: row[field] for field in COUNTER_FIELDS},
+            )
+        )
+
+    AttendanceSummary.objects.bulk_create(
+        summaries,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["student", "term", "academic_year"],
+        update_fields=COUNTER_FIELDS + ["attendance_percentage"],
+    )
+    AttendanceSummary.objects.filter(
+        id__in=[
+            pk
+            for pk, *key in AttendanceSummary.objects.values_list(
+                "id", "student_id", "term", "academic_year_id"
+            )
+            if tuple(key) not in found
+        ]
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("attendance", "0005_class_attendance_day"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_attendance_summaries, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,7 @@ from apps.accounts.models import User
 from apps.students.models import Student
 from apps.classes.models import Class
 from apps.school.models import AcademicYear, SchoolProfile
+from .lateness import minutes_late, school_opening
 
 
 class AttendanceSession(models.Model):
@@ -93,11 +94,9 @@ class Attendance(models.Model):
         return f"{self.student} - {self.session.date} - {self.get_status_display()}"
 
     def save(self, *args, **kwargs):
-        if self.status == 'L' and not self.minutes_late:
-            # Auto-calculate minutes late if time_in is provided
-            if self.time_in:
-                # Compare with school opening time (simplified)
-                self.minutes_late = 15  # Placeholder
+        if self.status == self.Status.LATE and not self.minutes_late and self.time_in:
+            # Time the arrival against the school opening time
+            self.minutes_late = minutes_late(self.time_in, school_opening())
         super().save(*args, **kwargs)
 
 
@@ -139,3 +138,129 @@ class AttendanceSummary(models.Model):
             self.attendance_percentage = (
                 self.days_present / self.total_days) * 100
         return self.attendance_percentage
+
+
+class AttendanceStrip(models.Model):
+    """Packed day-by-day attendance of a student for a term"""
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='attendance_strips')
+    term = models.CharField(max_length=10,
+                            choices=SchoolProfile.TermChoices.choices)
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE)
+
+    # One byte per calendar day from start_date: the Attendance.Status code
+    # of that day's closed session, or '-' when there is none
+    start_date = models.DateField()
+    days = models.BinaryField(default=bytes)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['student', 'term', 'academic_year']
+
+    def __str__(self):
+        return f"{self.student} - {self.term} {self.academic_year}"
+
+
+class AttendanceWatermark(models.Model):
+    """Last closed session a scheduled attendance job has processed"""
+    name = models.CharField(max_length=50, unique=True)
+    closed_at = models.DateTimeField(null=True, blank=True)
+    session_id = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} - {self.closed_at} #{self.session_id}"
+
+
+class AbsenceAlert(models.Model):
+    """Chronic-absence condition raised for a student in a term"""
+
+    class Kind(models.TextChoices):
+        LOW_ATTENDANCE = 'RATE', 'Attendance Below Threshold'
+        ABSENCE_STREAK = 'STREAK', 'Consecutive Absences'
+
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='absence_alerts')
+    term = models.CharField(max_length=10,
+                            choices=SchoolProfile.TermChoices.choices)
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE)
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+
+    # Attendance percentage or streak length when raised
+    value = models.DecimalField(max_digits=5, decimal_places=2)
+    is_active = models.BooleanField(default=True)  # Cleared once recovered
+    raised_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-raised_at']
+        indexes = [
+            models.Index(fields=['student', 'term', 'academic_year', 'kind', 'is_active']),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.get_kind_display()} ({self.value})"
+
+
+class AttendanceSyncReceipt(models.Model):
+    """Outcome of an offline attendance change, keyed by its client idempotency key"""
+
+    class Status(models.TextChoices):
+        APPLIED = 'APPLIED', 'Applied'
+        REJECTED = 'REJECTED', 'Rejected'
+
+    key = models.CharField(max_length=64, unique=True)
+    recorded_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='attendance_sync_receipts')
+    attendance = models.ForeignKey(
+        Attendance,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='sync_receipts')
+    status = models.CharField(max_length=10, choices=Status.choices)
+    error = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.key} - {self.get_status_display()}"
+
+
+class ClassAttendanceDay(models.Model):
+    """Closed-session attendance counts of a class on one day"""
+    class_assigned = models.ForeignKey(
+        Class,
+        on_delete=models.CASCADE,
+        related_name='attendance_days')
+    date = models.DateField()
+    term = models.CharField(max_length=10,
+                            choices=SchoolProfile.TermChoices.choices)
+    academic_year = models.ForeignKey(AcademicYear, on_delete=models.CASCADE)
+
+    # Counts per Attendance.Status
+    total = models.PositiveIntegerField(default=0)
+    present = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    excused = models.PositiveIntegerField(default=0)
+    holiday = models.PositiveIntegerField(default=0)
+
+    # Percentage present
+    attendance_rate = models.DecimalField(
+        max_digits=5, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['class_assigned', 'date']
+        ordering = ['date']
+
+    def __str__(self):
+        return f"{self.class_assigned} - {self.date} ({self.attendance_rate}%)"
@@ -0,0 +1,80 @@
+import csv
+
+from django.db.models import Count, Q
+
+from .models import Attendance
+from apps.students.models import Student
+
+
+REPORT_HEADER = [
+    'Student Name', 'Admission Number', 'Class', 'Total Days', 'Present',
+    'Absent', 'Late', 'Percentage',
+]
+
+
+def attendance_percentage(present_days, total_days):
+    return (present_days / total_days * 100) if total_days > 0 else 0
+
+
+def student_attendance_counts(term, academic_year, class_assigned=None,
+                              start_date=None, end_date=None):
+    """
+    Active students annotated with their attendance counts.
+
+    One query grouped by student: every count is a conditional aggregate
+    over the student's attendance rows for the term, optionally limited to
+    a class and a date range. Students without any rows get zeros.
+    """
+    in_period = Q(
+        attendances__session__term=term,
+        attendances__session__academic_year=academic_year
+    )
+    if start_date:
+        in_period &= Q(attendances__session__date__gte=start_date)
+    if end_date:
+        in_period &= Q(attendances__session__date__lte=end_date)
+
+    students = Student.objects.filter(enrollment_status='ACTIVE')
+    if class_assigned is not None:
+        students = students.filter(current_class=class_assigned)
+
+    return students.annotate(
+        total_days=Count('attendances', filter=in_period),
+        present_days=Count('attendances', filter=in_period & Q(
+            attendances__status=Attendance.Status.PRESENT)),
+        absent_days=Count('attendances', filter=in_period & Q(
+            attendances__status=Attendance.Status.ABSENT)),
+        late_days=Count('attendances', filter=in_period & Q(
+            attendances__status=Attendance.Status.LATE)),
+    ).order_by('current_class__name', 'user__last_name', 'user__first_name', 'id')
+
+
+class Echo:
+    """Pseudo-buffer whose write returns the value for streaming"""
+
+    def write(self, value):
+        return value
+
+
+def iter_attendance_report_csv(students, chunk_size=2000):
+    """Yield the CSV lines of an attendance report one student at a time"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(REPORT_HEADER)
+
+    rows = students.values_list(
+        'user__first_name', 'user__last_name', 'user__username',
+        'admission_number', 'current_class__name', 'total_days',
+        'present_days', 'absent_days', 'late_days'
+    )
+    for first_name, last_name, username, admission_number, class_name, \
+            total_days, present_days, absent_days, late_days in rows.iterator(chunk_size=chunk_size):
+        yield writer.writerow([
+            f"{first_name} {last_name}".strip() or username,
+            admission_number,
+            class_name,
+            total_days,
+            present_days,
+            absent_days,
+            late_days,
+            f"{attendance_percentage(present_days, total_days):.2f}%",
+        ])
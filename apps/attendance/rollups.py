@@ -0,0 +1,144 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from .models import AttendanceSession, Attendance, ClassAttendanceDay
+from .strips import sync_session_strips
+
+
+# Daily counter for each attendance status
+DAY_COUNTERS = {
+    Attendance.Status.PRESENT: 'present',
+    Attendance.Status.ABSENT: 'absent',
+    Attendance.Status.LATE: 'late',
+    Attendance.Status.EXCUSED: 'excused',
+    Attendance.Status.HOLIDAY: 'holiday',
+}
+
+DAY_KEY = ['class_assigned', 'date']
+DAY_UPDATE_FIELDS = [
+    'term', 'academic_year', 'total', *DAY_COUNTERS.values(), 'attendance_rate', 'updated_at',
+]
+
+
+def aggregate_class_days(attendances):
+    """Group attendance rows of closed sessions into one count row per class and day"""
+    return attendances.filter(session__is_closed=True).values(
+        'session__class_assigned_id', 'session__date', 'session__term',
+        'session__academic_year_id'
+    ).annotate(
+        total=Count('id'),
+        **{
+            counter: Count('id', filter=Q(status=status))
+            for status, counter in DAY_COUNTERS.items()
+        }
+    ).order_by()
+
+
+def build_class_day(row):
+    """Build an unsaved ClassAttendanceDay from an aggregate row"""
+    return ClassAttendanceDay(
+        class_assigned_id=row['session__class_assigned_id'],
+        date=row['session__date'],
+        term=row['session__term'],
+        academic_year_id=row['session__academic_year_id'],
+        total=row['total'],
+        attendance_rate=round(Decimal(row['present'] * 100) / row['total'], 2),
+        **{counter: row[counter] for counter in DAY_COUNTERS.values()}
+    )
+
+
+def write_class_days(days, stale, batch_size=None):
+    """Upsert computed day rows and delete the rows matching ``stale``"""
+    with transaction.atomic():
+        ClassAttendanceDay.objects.bulk_create(
+            days,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=DAY_KEY,
+            update_fields=DAY_UPDATE_FIELDS,
+        )
+        if stale is not None:
+            ClassAttendanceDay.objects.filter(stale).delete()
+
+
+def day_filter(keys):
+    """Q matching the given (class_id, date) keys"""
+    dates = defaultdict(set)
+    for class_id, date in keys:
+        dates[date].add(class_id)
+    condition = Q()
+    for date, class_ids in dates.items():
+        condition |= Q(date=date, class_assigned_id__in=class_ids)
+    return condition
+
+
+def refresh_class_days(sessions):
+    """
+    Recount the daily rollup for the class days of the given sessions.
+
+    Days are aggregated from their closed sessions in one grouped query and
+    written with one bulk upsert; days left without a closed session are
+    removed.
+    """
+    keys = {(session.class_assigned_id, session.date) for session in sessions}
+    if not keys:
+        return 0
+
+    days = [
+        build_class_day(row)
+        for row in aggregate_class_days(Attendance.objects.filter(
+            session__in=AttendanceSession.objects.filter(day_filter(keys))))
+    ]
+    stale = keys - {(day.class_assigned_id, day.date) for day in days}
+    write_class_days(days, day_filter(stale) if stale else None)
+    return len(days)
+
+
+def refresh_session_rollups(session, student_ids=None):
+    """Bring a session's strips and daily rollup in line with its rows"""
+    sync_session_strips(session, student_ids)
+    refresh_class_days([session])
+
+
+def rebuild_class_attendance_days(academic_year=None, term=None, batch_size=1000):
+    """Rebuild the daily rollup from closed attendance sessions"""
+    attendances = Attendance.objects.all()
+    existing = ClassAttendanceDay.objects.all()
+    if academic_year is not None:
+        attendances = attendances.filter(session__academic_year=academic_year)
+        existing = existing.filter(academic_year=academic_year)
+    if term is not None:
+        attendances = attendances.filter(session__term=term)
+        existing = existing.filter(term=term)
+
+    days = [build_class_day(row) for row in aggregate_class_days(attendances)]
+    found = {(day.class_assigned_id, day.date) for day in days}
+    stale_ids = [
+        pk for pk, *key in existing.values_list('id', 'class_assigned_id', 'date')
+        if tuple(key) not in found
+    ]
+    write_class_days(
+        days, Q(id__in=stale_ids) if stale_ids else None, batch_size=batch_size)
+    return len(days)
+
+
+def class_heatmap(class_ids, start_date, end_date):
+    """
+    Attendance rate per class per day between two dates.
+
+    Read from the daily rollup with one range scan over its (class, date)
+    index. Returns {class_id: [[date, rate, present, total], ...]} with
+    days in order; days without a closed session are absent.
+    """
+    heatmap = {class_id: [] for class_id in class_ids}
+    for class_id, date, rate, present, total in ClassAttendanceDay.objects.filter(
+        class_assigned_id__in=class_ids,
+        date__range=(start_date, end_date)
+    ).order_by('class_assigned_id', 'date').values_list(
+        'class_assigned_id', 'date', 'attendance_rate', 'present', 'total'
+    ):
+        heatmap[class_id].append([date.isoformat(), float(rate), present, total])
+    return heatmap
@@ -0,0 +1,83 @@
+from django.db import transaction
+from django.db.models import Q
+
+from .models import AttendanceSession, Attendance
+from apps.classes.models import Class
+from apps.school.models import Term
+from apps.students.models import Student
+
+
+def current_term():
+    """The current Term with its academic year loaded, or None"""
+    return Term.objects.select_related('academic_year').filter(is_current=True).first()
+
+
+def teacher_classes(teacher):
+    """Active classes a teacher takes attendance for"""
+    return Class.objects.filter(
+        Q(subject_allocations__teacher=teacher) |
+        Q(class_teacher=teacher),
+        status='ACTIVE'
+    ).distinct()
+
+
+def open_attendance_sessions(classes, date, taken_by, term=None,
+                             prefer_class_teacher=False, batch_size=1000):
+    """
+    Open attendance sessions for classes on a date.
+
+    Classes that already have a session for the date are skipped. New
+    sessions are written with one bulk insert and pre-filled with a
+    Present row for every active student in one more, all in a single
+    short transaction. ``term`` defaults to the current term; with
+    ``prefer_class_teacher`` a class's own class teacher is recorded as
+    the session taker when it has one.
+
+    Returns the list of created sessions.
+    """
+    term = term or current_term()
+    if term is None:
+        raise ValueError("No current term is set.")
+
+    classes = list(classes)
+    existing = set(AttendanceSession.objects.filter(
+        class_assigned__in=classes,
+        date=date,
+        term=term.term,
+        academic_year_id=term.academic_year_id
+    ).values_list('class_assigned_id', flat=True))
+
+    sessions = [
+        AttendanceSession(
+            class_assigned=class_obj,
+            date=date,
+            term=term.term,
+            academic_year_id=term.academic_year_id,
+            session_taken_by_id=(
+                prefer_class_teacher and class_obj.class_teacher_id or taken_by.id
+            ),
+        )
+        for class_obj in classes if class_obj.id not in existing
+    ]
+    if not sessions:
+        return []
+
+    with transaction.atomic():
+        AttendanceSession.objects.bulk_create(sessions)
+        session_by_class = {session.class_assigned_id: session for session in sessions}
+        students = Student.objects.filter(
+            current_class_id__in=session_by_class,
+            enrollment_status='ACTIVE'
+        ).values_list('id', 'current_class_id')
+        Attendance.objects.bulk_create(
+            [
+                Attendance(
+                    session=session_by_class[class_id],
+                    student_id=student_id,
+                    status=Attendance.Status.PRESENT
+                )
+                for student_id, class_id in students
+            ],
+            batch_size=batch_size
+        )
+    return sessions
@@ -0,0 +1,63 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import AttendanceSession, Attendance
+from .rollups import refresh_session_rollups
+from .summaries import apply_summary_deltas, session_deltas, status_delta
+
+
+@receiver(post_init, sender=AttendanceSession)
+def remember_session_closed(sender, instance, **kwargs):
+    instance._loaded_closed = instance.is_closed
+
+
+@receiver(post_save, sender=AttendanceSession)
+def update_summaries_for_session(sender, instance, **kwargs):
+    """Count a session's rows when it is closed and withdraw them if reopened"""
+    if instance.is_closed != instance._loaded_closed:
+        if instance.is_closed and not instance.closed_at:
+            # Scheduled jobs pick up closed sessions by their close time
+            instance.closed_at = timezone.now()
+            AttendanceSession.objects.filter(pk=instance.pk).update(closed_at=instance.closed_at)
+        apply_summary_deltas(session_deltas(instance, 1 if instance.is_closed else -1))
+        refresh_session_rollups(instance)
+        instance._loaded_closed = instance.is_closed
+
+
+@receiver(post_init, sender=Attendance)
+def remember_attendance_status(sender, instance, **kwargs):
+    instance._loaded_status = instance.status if instance.pk else None
+
+
+def closed_session(instance):
+    return AttendanceSession.objects.filter(
+        pk=instance.session_id, is_closed=True
+    ).only('id', 'date', 'term', 'academic_year_id', 'is_closed').first()
+
+
+def summary_key(instance, session):
+    return (instance.student_id, session.term, session.academic_year_id)
+
+
+@receiver(post_save, sender=Attendance)
+def update_summary_for_attendance(sender, instance, created, **kwargs):
+    """Move a single row's count when it changes on a closed session"""
+    loaded_status = None if created else instance._loaded_status
+    if instance.status != loaded_status:
+        session = closed_session(instance)
+        if session:
+            delta = status_delta(instance.status)
+            if loaded_status is not None:
+                delta.subtract(status_delta(loaded_status))
+            apply_summary_deltas({summary_key(instance, session): delta})
+            refresh_session_rollups(session, [instance.student_id])
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=Attendance)
+def withdraw_attendance_from_summary(sender, instance, **kwargs):
+    session = closed_session(instance)
+    if session:
+        apply_summary_deltas({summary_key(instance, session): status_delta(instance._loaded_status, -1)})
+        refresh_session_rollups(session, [instance.student_id])
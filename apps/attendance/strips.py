@@ -0,0 +1,177 @@
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AttendanceSession, Attendance, AttendanceStrip
+from apps.school.models import Term
+
+
+# Byte for a day without a closed session (weekends, holidays, open sessions)
+NO_SESSION = b'-'
+STATUS_CODES = [status.encode() for status in Attendance.Status.values]
+
+ABSENT_RUN = re.compile(rb'A+')
+
+
+def day_index(start_date, date):
+    return (date - start_date).days
+
+
+def set_days(strip, entries):
+    """
+    Write (date, code) entries into a strip's day array.
+
+    The array grows as needed, including backwards when a date falls
+    before ``start_date``.
+    """
+    days = bytearray(strip.days or b'')
+    for date, code in entries:
+        index = day_index(strip.start_date, date)
+        if index < 0:
+            days[:0] = NO_SESSION * -index
+            strip.start_date = date
+            index = 0
+        if index >= len(days):
+            days.extend(NO_SESSION * (index + 1 - len(days)))
+        days[index] = code[0]
+    strip.days = bytes(days)
+
+
+def window(strip, start=None, end=None):
+    """The strip's day bytes between two dates, both inclusive"""
+    days = bytes(strip.days)
+    lower = max(day_index(strip.start_date, start), 0) if start else 0
+    upper = max(day_index(strip.start_date, end) + 1, 0) if end else len(days)
+    return days[lower:upper]
+
+
+def strip_counts(strip, start=None, end=None):
+    """Counts per status code over a date range; ``total`` counts every session day"""
+    days = window(strip, start, end)
+    counts = Counter({code.decode(): days.count(code) for code in STATUS_CODES})
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+def absence_streaks(strip, start=None, end=None):
+    """
+    (current, longest) runs of consecutive absences over session days.
+
+    Days without a session are dropped first, so weekends and holidays do
+    not break a run. ``current`` is the run ending at the latest session.
+    """
+    sessions = window(strip, start, end).replace(NO_SESSION, b'')
+    runs = [len(run) for run in ABSENT_RUN.findall(sessions)]
+    current = len(sessions) - len(sessions.rstrip(b'A'))
+    return current, max(runs, default=0)
+
+
+def attendance_rate(strip, start=None, end=None):
+    counts = strip_counts(strip, start, end)
+    total = counts['total']
+    return (counts[Attendance.Status.PRESENT] / total * 100) if total else None
+
+
+def term_start(term, academic_year_id, fallback):
+    start = Term.objects.filter(
+        term=term, academic_year_id=academic_year_id
+    ).values_list('start_date', flat=True).first()
+    return start or fallback
+
+
+def sync_session_strips(session, student_ids=None):
+    """
+    Bring the strips of a session's students in line with the database.
+
+    Each student's byte for the session date becomes their status if the
+    session is closed and ``NO_SESSION`` otherwise (or when their row is
+    gone). ``student_ids`` limits the update to some students; by default
+    every student with a row in the session is written. ``session`` must
+    carry its current ``is_closed`` state.
+    """
+    rows = Attendance.objects.filter(session_id=session.pk)
+    if student_ids is not None:
+        rows = rows.filter(student_id__in=student_ids)
+    statuses = dict(rows.values_list('student_id', 'status')) if session.is_closed else {}
+    if student_ids is None:
+        student_ids = statuses if session.is_closed else rows.values_list('student_id', flat=True)
+    student_ids = set(student_ids)
+    if not student_ids:
+        return 0
+
+    strips = {
+        strip.student_id: strip
+        for strip in AttendanceStrip.objects.filter(
+            student_id__in=student_ids,
+            term=session.term,
+            academic_year_id=session.academic_year_id
+        )
+    }
+    start = None
+    now = timezone.now()
+    created = []
+    for student_id in student_ids:
+        strip = strips.get(student_id)
+        if strip is None:
+            if student_id not in statuses:
+                continue
+            if start is None:
+                start = term_start(session.term, session.academic_year_id, session.date)
+            strip = AttendanceStrip(
+                student_id=student_id,
+                term=session.term,
+                academic_year_id=session.academic_year_id,
+                start_date=start,
+            )
+            created.append(strip)
+        status = statuses.get(student_id)
+        set_days(strip, [(session.date, status.encode() if status else NO_SESSION)])
+        strip.updated_at = now
+
+    with transaction.atomic():
+        AttendanceStrip.objects.bulk_create(created, ignore_conflicts=True)
+        AttendanceStrip.objects.bulk_update(list(strips.values()), ['start_date', 'days', 'updated_at'])
+    return len(created) + len(strips)
+
+
+def rebuild_attendance_strips(academic_year=None, term=None, batch_size=1000):
+    """Rebuild strips from the rows of closed attendance sessions"""
+    sessions = AttendanceSession.objects.filter(is_closed=True)
+    strips = AttendanceStrip.objects.all()
+    if academic_year is not None:
+        sessions = sessions.filter(academic_year=academic_year)
+        strips = strips.filter(academic_year=academic_year)
+    if term is not None:
+        sessions = sessions.filter(term=term)
+        strips = strips.filter(term=term)
+
+    starts = {}
+    entries = {}
+    rows = Attendance.objects.filter(session__in=sessions).values_list(
+        'student_id', 'session__term', 'session__academic_year_id',
+        'session__date', 'status'
+    ).order_by('student_id')
+    for student_id, row_term, academic_year_id, date, status in rows.iterator(chunk_size=batch_size):
+        entries.setdefault((student_id, row_term, academic_year_id), []).append(
+            (date, status.encode()))
+
+    built = []
+    for (student_id, row_term, academic_year_id), days in entries.items():
+        period = (row_term, academic_year_id)
+        if period not in starts:
+            starts[period] = term_start(row_term, academic_year_id, min(days)[0])
+        strip = AttendanceStrip(
+            student_id=student_id,
+            term=row_term,
+            academic_year_id=academic_year_id,
+            start_date=starts[period],
+        )
+        set_days(strip, days)
+        built.append(strip)
+
+    with transaction.atomic():
+        strips.delete()
+        AttendanceStrip.objects.bulk_create(built, batch_size=batch_size)
+    return len(built)
@@ -0,0 +1,244 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import AttendanceSession, Attendance, AttendanceSummary
+from .rollups import refresh_session_rollups
+
+
+# Summary counter for each attendance status; every row also counts in total_days
+STATUS_COUNTERS = {
+    Attendance.Status.PRESENT: 'days_present',
+    Attendance.Status.ABSENT: 'days_absent',
+    Attendance.Status.LATE: 'days_late',
+    Attendance.Status.EXCUSED: 'days_excused',
+}
+COUNTER_FIELDS = ['total_days', 'days_present', 'days_absent', 'days_late', 'days_excused']
+
+SUMMARY_KEY = ['student', 'term', 'academic_year']
+
+
+def status_delta(status, sign=1):
+    """Counter changes for adding (or with ``sign=-1`` removing) one row"""
+    delta = Counter({'total_days': sign})
+    if status in STATUS_COUNTERS:
+        delta[STATUS_COUNTERS[status]] += sign
+    return delta
+
+
+def percentage_expression():
+    return Case(
+        When(total_days=0, then=Value(0.0)),
+        default=Cast(F('days_present'), FloatField()) * 100 / F('total_days'),
+        output_field=FloatField(),
+    )
+
+
+def apply_summary_deltas(deltas):
+    """
+    Adjust summary counters in place.
+
+    ``deltas`` maps (student_id, term, academic_year_id) to a Counter of
+    counter changes. Missing summary rows are created first; students
+    sharing the same change are then updated together with one ``F()``
+    UPDATE, and only the touched rows get their percentage recalculated.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if any(delta.values())}
+    if not deltas:
+        return 0
+
+    groups = defaultdict(list)
+    periods = defaultdict(set)
+    for (student_id, term, academic_year_id), delta in deltas.items():
+        change = tuple(sorted((field, value) for field, value in delta.items() if value))
+        groups[(term, academic_year_id, change)].append(student_id)
+        periods[(term, academic_year_id)].add(student_id)
+
+    with transaction.atomic():
+        AttendanceSummary.objects.bulk_create(
+            [
+                AttendanceSummary(student_id=student_id, term=term, academic_year_id=academic_year_id)
+                for (student_id, term, academic_year_id) in deltas
+            ],
+            ignore_conflicts=True
+        )
+        for (term, academic_year_id, change), student_ids in groups.items():
+            AttendanceSummary.objects.filter(
+                student_id__in=student_ids, term=term, academic_year_id=academic_year_id
+            ).update(**{field: F(field) + value for field, value in change})
+        for (term, academic_year_id), student_ids in periods.items():
+            AttendanceSummary.objects.filter(
+                student_id__in=student_ids, term=term, academic_year_id=academic_year_id
+            ).update(attendance_percentage=percentage_expression())
+    return len(deltas)
+
+
+def session_deltas(session, sign=1):
+    """Counter changes for adding (or removing) every row of a session"""
+    deltas = defaultdict(Counter)
+    for student_id, status in session.attendances.values_list('student_id', 'status'):
+        deltas[(student_id, session.term, session.academic_year_id)].update(status_delta(status, sign))
+    return deltas
+
+
+def change_deltas(session, changes):
+    """Counter changes for rows of a session moving from one status to another"""
+    deltas = defaultdict(Counter)
+    for student_id, old_status, new_status in changes:
+        if old_status == new_status:
+            continue
+        key = (student_id, session.term, session.academic_year_id)
+        deltas[key].update(status_delta(new_status))
+        deltas[key].subtract(status_delta(old_status))
+    return deltas
+
+
+def close_session(session, closed_by):
+    """
+    Close a session and add its rows to the summaries, strips and daily rollup.
+
+    The session is flipped with a conditional UPDATE, so a session closed
+    twice at the same time is only counted once. Returns False if the
+    session was already closed.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        closed = AttendanceSession.objects.filter(pk=session.pk, is_closed=False).update(
+            is_closed=True, closed_by=closed_by, closed_at=now, last_updated=now
+        )
+        session.is_closed = True
+        session._loaded_closed = True
+        if closed:
+            session.closed_by = closed_by
+            session.closed_at = now
+            apply_summary_deltas(session_deltas(session))
+            refresh_session_rollups(session)
+    return bool(closed)
+
+
+def count_attendance(attendances):
+    """Group attendance rows into summary counts per student, term and year"""
+    return attendances.values(
+        'student_id', 'session__term', 'session__academic_year_id'
+    ).annotate(
+        total_days=Count('id'),
+        **{
+            counter: Count('id', filter=Q(status=status))
+            for status, counter in STATUS_COUNTERS.items()
+        }
+    ).order_by()
+
+
+def aggregate_summaries(attendances):
+    """Group attendance rows of closed sessions into summary counts"""
+    return count_attendance(attendances.filter(session__is_closed=True))
+
+
+def open_session_counts(attendances):
+    """Summary counts of attendance rows in sessions that are still open"""
+    return count_attendance(attendances.filter(session__is_closed=False))
+
+
+def summary_key(row):
+    return (row['student_id'], row['session__term'], row['session__academic_year_id'])
+
+
+def scoped(queryset, academic_year=None, term=None, prefix=''):
+    if academic_year is not None:
+        queryset = queryset.filter(**{f'{prefix}academic_year': academic_year})
+    if term is not None:
+        queryset = queryset.filter(**{f'{prefix}term': term})
+    return queryset
+
+
+def rebuild_attendance_summaries(academic_year=None, term=None, batch_size=1000):
+    """Recount summaries from closed attendance sessions"""
+    rows = aggregate_summaries(scoped(
+        Attendance.objects.all(), academic_year, term, prefix='session__'))
+    summaries = []
+    for row in rows:
+        summary = AttendanceSummary(
+            student_id=row['student_id'],
+            term=row['session__term'],
+            academic_year_id=row['session__academic_year_id'],
+            **{field: row[field] for field in COUNTER_FIELDS}
+        )
+        summary.calculate_percentage()
+        summaries.append(summary)
+
+    found = {(s.student_id, s.term, s.academic_year_id) for s in summaries}
+    with transaction.atomic():
+        AttendanceSummary.objects.bulk_create(
+            summaries,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=SUMMARY_KEY,
+            update_fields=COUNTER_FIELDS + ['attendance_percentage'],
+        )
+        stale_ids = [
+            pk for pk, *key in scoped(
+                AttendanceSummary.objects.all(), academic_year, term
+            ).values_list('id', 'student_id', 'term', 'academic_year_id')
+            if tuple(key) not in found
+        ]
+        AttendanceSummary.objects.filter(id__in=stale_ids).delete()
+    return len(summaries)
+
+
+def find_summary_mismatches(academic_year=None, term=None):
+    """
+    Compare stored summaries with a recount from attendance rows.
+
+    Returns a list of (key, stored counts, expected counts) for every
+    summary that differs, where missing rows count as all zeros.
+    """
+    zeros = {field: 0 for field in COUNTER_FIELDS}
+    expected = {
+        summary_key(row): {field: row[field] for field in COUNTER_FIELDS}
+        for row in aggregate_summaries(scoped(
+            Attendance.objects.all(), academic_year, term, prefix='session__'))
+    }
+    stored = {
+        (row['student_id'], row['term'], row['academic_year_id']): {
+            field: row[field] for field in COUNTER_FIELDS
+        }
+        for row in scoped(AttendanceSummary.objects.all(), academic_year, term).values(
+            'student_id', 'term', 'academic_year_id', *COUNTER_FIELDS)
+    }
+
+    mismatches = []
+    for key in sorted(expected.keys() | stored.keys(), key=str):
+        have = stored.get(key, zeros)
+        want = expected.get(key, zeros)
+        if have != want:
+            mismatches.append((key, have, want))
+    return mismatches
+
+
+def attendance_totals(student, term=None, academic_year=None):
+    """
+    Attendance counts and percentage for a student.
+
+    Summaries only hold closed sessions, so rows of sessions that are still
+    open are counted on top, matching the student's attendance list.
+    """
+    totals = scoped(
+        AttendanceSummary.objects.filter(student=student), academic_year, term
+    ).aggregate(**{field: Sum(field) for field in COUNTER_FIELDS})
+    totals = Counter({field: value or 0 for field, value in totals.items()})
+    for row in open_session_counts(scoped(
+            Attendance.objects.filter(student=student), academic_year, term, prefix='session__')):
+        totals.update({field: row[field] for field in COUNTER_FIELDS})
+    total_days = totals['total_days']
+    return {
+        'total_days': total_days,
+        'present_days': totals['days_present'],
+        'absent_days': totals['days_absent'],
+        'late_days': totals['days_late'],
+        'excused_days': totals['days_excused'],
+        'attendance_percentage': (
+            totals['days_present'] / total_days * 100) if total_days > 0 else 0,
+    }
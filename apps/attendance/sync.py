@@ -0,0 +1,253 @@
+import datetime
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_time
+
+from .lateness import school_opening
+from .marking import MARK_FIELDS, apply_mark
+from .models import AttendanceSession, Attendance, AttendanceSyncReceipt
+from .sessions import current_term, open_attendance_sessions, teacher_classes
+from apps.classes.models import Class
+from apps.students.models import Student
+
+
+# Times a batch is retried after losing a race for one of its receipt keys
+SYNC_ATTEMPTS = 3
+
+
+def parse_change(change):
+    """Validate one client change; returns (change dict, error)"""
+    try:
+        key = str(change['key'])
+        parsed = {
+            'key': key,
+            'class_id': int(change['class_id']),
+            'student_id': int(change['student_id']),
+            'date': datetime.date.fromisoformat(change['date']),
+            'status': change['status'],
+            'note': str(change.get('note') or ''),
+        }
+    except (KeyError, TypeError, ValueError):
+        return None, 'Malformed change'
+    if not key or len(key) > 64:
+        return None, 'Invalid idempotency key'
+    if parsed['status'] not in Attendance.Status.values:
+        return parsed, 'Invalid status'
+    if 'time_in' in change:
+        try:
+            parsed['time_in'] = parse_time(change['time_in']) if change['time_in'] else None
+        except (TypeError, ValueError):
+            return parsed, 'Invalid time in'
+    return parsed, None
+
+
+def receipt_result(receipt, replayed=False):
+    result = {
+        'key': receipt.key,
+        'status': 'applied' if receipt.status == AttendanceSyncReceipt.Status.APPLIED else 'rejected',
+        'attendance_id': receipt.attendance_id,
+    }
+    if receipt.error:
+        result['error'] = receipt.error
+    if replayed:
+        result['replayed'] = True
+    return result
+
+
+def apply_sync_changes(changes, user, term=None):
+    """
+    Apply a batch of offline attendance changes.
+
+    Each change names a class, date, student and status with a client
+    idempotency key. Keys already seen, in earlier syncs or earlier in the
+    batch, are not applied again and get the stored outcome back. Missing
+    sessions for the current term are opened in bulk; changes to closed
+    sessions, classes the user does not teach or students outside the class
+    are rejected. Accepted changes are written in bulk, only for rows they
+    actually change, and a receipt per key is stored in the same
+    transaction.
+
+    A concurrent batch may store the receipt for a new key first; the
+    losing batch is then rolled back as a whole and applied again, so those
+    keys are answered from the stored receipt.
+
+    Returns one result per change, in order.
+    """
+    term = term or current_term()
+    if term is None:
+        raise ValueError("No current term is set.")
+
+    for attempt in range(SYNC_ATTEMPTS):
+        try:
+            return apply_sync_batch(changes, user, term)
+        except IntegrityError:
+            if attempt == SYNC_ATTEMPTS - 1:
+                raise
+
+
+def apply_sync_batch(changes, user, term):
+    """Apply one attempt of a sync batch in a single transaction"""
+    parsed = [parse_change(change) for change in changes]
+    keys = {change['key'] for change, _ in parsed if change}
+    seen = AttendanceSyncReceipt.objects.in_bulk(keys, field_name='key')
+
+    class_ids = {change['class_id'] for change, error in parsed if change and not error}
+    allowed = set(teacher_classes(user).filter(id__in=class_ids).values_list('id', flat=True))
+    student_classes = dict(Student.objects.filter(
+        id__in={change['student_id'] for change, error in parsed if change and not error},
+        enrollment_status='ACTIVE'
+    ).values_list('id', 'current_class_id'))
+
+    results = [None] * len(parsed)
+    receipts = {}
+    accepted = []
+    for idx, (change, error) in enumerate(parsed):
+        if change is None:
+            results[idx] = {'key': None, 'status': 'rejected', 'error': error}
+            continue
+        key = change['key']
+        if key in seen:
+            results[idx] = receipt_result(seen[key], replayed=True)
+            continue
+        if key in receipts:
+            results[idx] = (key, True)
+            continue
+        if error is None:
+            if change['class_id'] not in allowed:
+                error = 'Not allowed to take attendance for this class'
+            elif student_classes.get(change['student_id']) != change['class_id']:
+                error = 'Student is not active in this class'
+        receipts[key] = AttendanceSyncReceipt(
+            key=key,
+            recorded_by=user,
+            status=AttendanceSyncReceipt.Status.REJECTED if error else AttendanceSyncReceipt.Status.APPLIED,
+            error=error or '',
+        )
+        results[idx] = (key, False)
+        if error is None:
+            accepted.append(change)
+
+    with transaction.atomic():
+        sessions = {}
+        if accepted:
+            dates = defaultdict(set)
+            for change in accepted:
+                dates[change['date']].add(change['class_id'])
+            for date, date_class_ids in dates.items():
+                open_attendance_sessions(
+                    Class.objects.filter(id__in=date_class_ids), date, user, term=term)
+            for session in AttendanceSession.objects.filter(
+                class_assigned_id__in={change['class_id'] for change in accepted},
+                date__in=dates,
+                term=term.term,
+                academic_year_id=term.academic_year_id
+            ):
+                sessions[(session.class_assigned_id, session.date)] = session
+
+        rows = {
+            (row.session_id, row.student_id): row
+            for row in Attendance.objects.filter(
+                session__in=[session for session in sessions.values() if not session.is_closed],
+                student_id__in={change['student_id'] for change in accepted}
+            )
+        }
+        opening = school_opening()
+        changed = {}
+        for change in accepted:
+            session = sessions[(change['class_id'], change['date'])]
+            receipt = receipts[change['key']]
+            if session.is_closed:
+                receipt.status = AttendanceSyncReceipt.Status.REJECTED
+                receipt.error = 'Attendance session is closed'
+                continue
+            row_key = (session.id, change['student_id'])
+            row = rows.get(row_key)
+            if row is None:
+                row = rows[row_key] = Attendance(session=session, student_id=change['student_id'])
+            if apply_mark(row, change['status'], change['note'],
+                          change.get('time_in', row.time_in), opening):
+                changed[row_key] = row
+
+        if changed:
+            Attendance.objects.bulk_update(
+                [row for row in changed.values() if row.pk], MARK_FIELDS)
+            # Students enrolled after a session was opened have no row yet;
+            # upsert them in case a concurrent sync inserts the same rows
+            Attendance.objects.bulk_create(
+                [row for row in changed.values() if not row.pk],
+                update_conflicts=True,
+                unique_fields=['session', 'student'],
+                update_fields=MARK_FIELDS,
+            )
+            AttendanceSession.objects.filter(
+                id__in={session_id for session_id, _ in changed}
+            ).update(last_updated=timezone.now())
+
+        attendance_ids = dict(
+            ((session_id, student_id), pk)
+            for pk, session_id, student_id in Attendance.objects.filter(
+                session_id__in={session.id for session in sessions.values()},
+                student_id__in={change['student_id'] for change in accepted}
+            ).values_list('id', 'session_id', 'student_id')
+        ) if accepted else {}
+        for change in accepted:
+            receipt = receipts[change['key']]
+            if receipt.status == AttendanceSyncReceipt.Status.APPLIED:
+                session = sessions[(change['class_id'], change['date'])]
+                receipt.attendance_id = attendance_ids.get((session.id, change['student_id']))
+        AttendanceSyncReceipt.objects.bulk_create(receipts.values())
+
+    return [
+        receipt_result(receipts[result[0]], replayed=result[1])
+        if isinstance(result, tuple) else result
+        for result in results
+    ]
+
+
+def sync_delta(user, since=None, term=None):
+    """
+    Server-side attendance changed since a sync token.
+
+    Returns the sessions of the user's classes in the current term updated
+    after ``since`` (all of them without a token), each with compact
+    ``[student_id, status, time_in]`` rows, and the token for the next sync.
+    """
+    term = term or current_term()
+    token = timezone.now()
+    if term is None:
+        return {'token': token.isoformat(), 'sessions': []}
+
+    sessions = AttendanceSession.objects.filter(
+        class_assigned__in=teacher_classes(user),
+        term=term.term,
+        academic_year_id=term.academic_year_id,
+        last_updated__lte=token
+    )
+    try:
+        since = parse_datetime(since) if since else None
+    except ValueError:
+        since = None
+    if since is not None:
+        sessions = sessions.filter(last_updated__gt=since)
+    sessions = {
+        session_id: {
+            'id': session_id,
+            'class_id': class_id,
+            'date': date.isoformat(),
+            'is_closed': is_closed,
+            'rows': [],
+        }
+        for session_id, class_id, date, is_closed in sessions.values_list(
+            'id', 'class_assigned_id', 'date', 'is_closed')
+    }
+    for session_id, student_id, status, time_in in Attendance.objects.filter(
+        session_id__in=sessions
+    ).order_by('session_id', 'student_id').values_list(
+        'session_id', 'student_id', 'status', 'time_in'
+    ):
+        sessions[session_id]['rows'].append(
+            [student_id, status, time_in.strftime('%H:%M') if time_in else None])
+
+    return {'token': token.isoformat(), 'sessions': list(sessions.values())}
@@ -37,4 +37,6 @@ urlpatterns = [
     # API URLs
     path('api/summary/<int:student_id>/', views.get_attendance_summary, name='get_attendance_summary'),
     path('api/close/<int:session_id>/', views.close_attendance_session, name='close_attendance_session'),
+    path('api/sync/', views.sync_attendance, name='sync_attendance'),
+    path('api/heatmap/', views.attendance_heatmap, name='attendance_heatmap'),
 ]
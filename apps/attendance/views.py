@@ -4,13 +4,21 @@ from django.contrib import messages
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import IntegrityError
 from django.db.models import Q, Count, Sum
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_time
 from django.utils.decorators import method_decorator
-import csv
+import json
 
 from .models import AttendanceSession, Attendance, AttendanceSummary
+from .marking import mark_session_attendance
+from .reports import attendance_percentage, iter_attendance_report_csv, student_attendance_counts
+from .rollups import class_heatmap
+from .sessions import current_term, open_attendance_sessions, teacher_classes
+from .summaries import attendance_totals, close_session
+from .sync import apply_sync_changes, sync_delta
 from .forms import (
     AttendanceSessionForm, BulkAttendanceForm,
     IndividualAttendanceForm, AttendanceReportForm
@@ -18,7 +26,7 @@ from .forms import (
 from apps.accounts.decorators import teacher_required, principal_required, admin_required
 from apps.classes.models import Class, SubjectAllocation
 from apps.students.models import Student
-from apps.school.models import Term, AcademicYear
+from apps.school.models import Term
 
 # Attendance Session Views
 @login_required
@@ -28,11 +36,7 @@ def take_attendance(request):
     teacher = request.user
     
     # Get classes taught by this teacher
-    classes_taught = Class.objects.filter(
-        Q(subject_allocations__teacher=teacher) |
-        Q(class_teacher=teacher),
-        status='ACTIVE'
-    ).distinct()
+    classes_taught = teacher_classes(teacher)
     
     if request.method == 'POST':
         class_id = request.POST.get('class_id')
@@ -40,33 +44,27 @@ def take_attendance(request):
         
         class_obj = get_object_or_404(Class, id=class_id)
         
-        # Check if session already exists
-        session, created = AttendanceSession.objects.get_or_create(
-            class_assigned=class_obj,
-            date=date,
-            defaults={
-                'term': Term.objects.filter(is_current=True).first().term if Term.objects.filter(is_current=True).exists() else None,
-                'academic_year': AcademicYear.objects.filter(is_current=True).first(),
-                'session_taken_by': teacher
-            }
-        )
-        
+        term = current_term()
+        if term is None:
+            messages.error(request, "No current term is set.")
+            return redirect('attendance:take_attendance')
+
+        try:
+            created = open_attendance_sessions([class_obj], date, teacher, term=term)
+        except IntegrityError:
+            # Opened concurrently by someone else
+            created = []
+
         if created:
-            # Create attendance records for all students
-            students = Student.objects.filter(
-                current_class=class_obj,
-                enrollment_status='ACTIVE'
-            )
-            
-            for student in students:
-                Attendance.objects.create(
-                    session=session,
-                    student=student,
-                    status='P'  # Default to present
-                )
-            
+            session = created[0]
             messages.success(request, f"Attendance session created for {class_obj.name} on {date}")
         else:
+            session = AttendanceSession.objects.get(
+                class_assigned=class_obj,
+                date=date,
+                term=term.term,
+                academic_year_id=term.academic_year_id
+            )
             messages.info(request, f"Attendance session already exists for {class_obj.name} on {date}")
         
         return redirect('attendance:mark_attendance', session_id=session.id)
@@ -100,31 +98,42 @@ def mark_attendance(request, session_id):
     attendances = Attendance.objects.filter(session=session).select_related('student__user')
     
     if request.method == 'POST':
-        # Process attendance updates
+        # Collect submitted marks and write only the rows that changed
+        marks = {}
+        invalid_times = []
         for attendance in attendances:
             status = request.POST.get(f'status_{attendance.id}')
-            note = request.POST.get(f'note_{attendance.id}', '')
-            
-            if status:
-                attendance.status = status
-                attendance.note = note
-                
-                # Calculate minutes late if status is late
-                if status == 'L':
-                    time_in = request.POST.get(f'time_in_{attendance.id}')
-                    if time_in:
-                        # Parse time and calculate minutes late compared to school opening
-                        # This is simplified - you'd need proper time comparison
-                        attendance.minutes_late = 15  # Placeholder
-                
-                attendance.save()
-        
-        messages.success(request, "Attendance marked successfully.")
+            if status not in Attendance.Status.values:
+                continue
+            mark = {
+                'status': status,
+                'note': request.POST.get(f'note_{attendance.id}', ''),
+            }
+            time_in = request.POST.get(f'time_in_{attendance.id}')
+            if time_in:
+                try:
+                    mark['time_in'] = parse_time(time_in)
+                except ValueError:
+                    mark['time_in'] = None
+                if mark['time_in'] is None:
+                    # Leave the row as stored rather than clearing its time in
+                    invalid_times.append(attendance.student.user.get_full_name())
+                    continue
+            elif time_in is not None:
+                mark['time_in'] = None
+            marks[attendance.id] = mark
+
+        changed = mark_session_attendance(session, attendances, marks)
+        messages.success(request, f"Attendance marked successfully ({len(changed)} changed).")
+        if invalid_times:
+            messages.warning(
+                request,
+                f"Invalid time in, not saved for: {', '.join(invalid_times)}."
+            )
         
         # Check if this was the last action
         if 'save_and_close' in request.POST:
-            session.is_closed = True
-            session.save()
+            close_session(session, request.user)
             messages.success(request, "Attendance session closed.")
             return redirect('attendance:attendance_history')
         
@@ -253,70 +262,42 @@ def attendance_report(request):
             start_date = form.cleaned_data['start_date']
             end_date = form.cleaned_data['end_date']
             
-            # Get sessions within date range
-            sessions = AttendanceSession.objects.filter(
+            students = student_attendance_counts(
+                term, academic_year,
                 class_assigned=class_assigned,
-                date__range=[start_date, end_date] if start_date and end_date else None
+                start_date=start_date,
+                end_date=end_date
             )
             
-            # Get all students in class
-            students = Student.objects.filter(
-                current_class=class_assigned,
-                enrollment_status='ACTIVE'
-            ).select_related('user')
-            
-            # Calculate attendance statistics
-            report_data = []
-            for student in students:
-                attendances = Attendance.objects.filter(
-                    student=student,
-                    session__in=sessions
-                )
-                
-                total_days = attendances.count()
-                present_days = attendances.filter(status='P').count()
-                absent_days = attendances.filter(status='A').count()
-                late_days = attendances.filter(status='L').count()
-                
-                attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
-                
-                report_data.append({
-                    'student': student,
-                    'total_days': total_days,
-                    'present_days': present_days,
-                    'absent_days': absent_days,
-                    'late_days': late_days,
-                    'attendance_percentage': attendance_percentage
-                })
-            
             # Generate CSV if requested
             if 'export_csv' in request.POST:
-                response = HttpResponse(content_type='text/csv')
-                response['Content-Disposition'] = f'attachment; filename="attendance_report_{class_assigned.name}_{term}.csv"'
-                
-                writer = csv.writer(response)
-                writer.writerow(['Student Name', 'Admission Number', 'Total Days', 'Present', 'Absent', 'Late', 'Percentage'])
-                
-                for data in report_data:
-                    writer.writerow([
-                        data['student'].user.get_full_name(),
-                        data['student'].admission_number,
-                        data['total_days'],
-                        data['present_days'],
-                        data['absent_days'],
-                        data['late_days'],
-                        f"{data['attendance_percentage']:.2f}%"
-                    ])
-                
+                scope = class_assigned.name if class_assigned else 'all_classes'
+                response = StreamingHttpResponse(
+                    iter_attendance_report_csv(students),
+                    content_type='text/csv'
+                )
+                response['Content-Disposition'] = f'attachment; filename="attendance_report_{scope}_{term}.csv"'
                 return response
             
+            report_data = [
+                {
+                    'student': student,
+                    'total_days': student.total_days,
+                    'present_days': student.present_days,
+                    'absent_days': student.absent_days,
+                    'late_days': student.late_days,
+                    'attendance_percentage': attendance_percentage(
+                        student.present_days, student.total_days)
+                }
+                for student in students.select_related('user', 'current_class')
+            ]
+            
             context = {
                 'form': form,
                 'class_assigned': class_assigned,
                 'term': term,
                 'academic_year': academic_year,
                 'report_data': report_data,
-                'sessions': sessions,
                 'title': 'Attendance Report'
             }
             return render(request, 'attendance/report_results.html', context)
@@ -346,28 +327,87 @@ def get_attendance_summary(request, student_id):
     current_term = Term.objects.filter(is_current=True).first()
     
     if current_term:
-        attendance = Attendance.objects.filter(
-            student=student,
-            session__term=current_term.term,
-            session__academic_year__is_current=True
-        )
-        
-        total_days = attendance.count()
-        present_days = attendance.filter(status='P').count()
-        absent_days = attendance.filter(status='A').count()
-        late_days = attendance.filter(status='L').count()
-        
+        totals = attendance_totals(
+            student, term=current_term.term, academic_year=current_term.academic_year_id)
         return JsonResponse({
             'student_name': student.user.get_full_name(),
-            'total_days': total_days,
-            'present_days': present_days,
-            'absent_days': absent_days,
-            'late_days': late_days,
-            'attendance_percentage': (present_days / total_days * 100) if total_days > 0 else 0
+            'total_days': totals['total_days'],
+            'present_days': totals['present_days'],
+            'absent_days': totals['absent_days'],
+            'late_days': totals['late_days'],
+            'attendance_percentage': totals['attendance_percentage']
         })
     
     return JsonResponse({'error': 'No current term found'}, status=404)
 
+@login_required
+@teacher_required
+def sync_attendance(request):
+    """Offline sync endpoint: apply a batch of attendance changes and return the server delta"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request'})
+    
+    try:
+        payload = json.loads(request.body)
+        changes = payload.get('changes', [])
+        since = payload.get('since')
+    except (ValueError, AttributeError):
+        changes = None
+    if not isinstance(changes, list):
+        return JsonResponse({'success': False, 'error': 'Expected a JSON body with a "changes" list'}, status=400)
+    
+    term = current_term()
+    if term is None:
+        return JsonResponse({'success': False, 'error': 'No current term found'}, status=404)
+    
+    results = apply_sync_changes(changes, request.user, term=term)
+    delta = sync_delta(request.user, since=since, term=term)
+    return JsonResponse({
+        'success': all(result['status'] == 'applied' for result in results),
+        'results': results,
+        'token': delta['token'],
+        'sessions': delta['sessions']
+    })
+
+@login_required
+@admin_required
+def attendance_heatmap(request):
+    """API endpoint for a term's attendance rate per class per day"""
+    term = request.GET.get('term')
+    academic_year_id = request.GET.get('academic_year')
+    if term and academic_year_id:
+        try:
+            academic_year_id = int(academic_year_id)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid academic year'}, status=400)
+        term_obj = Term.objects.filter(term=term, academic_year_id=academic_year_id).first()
+    else:
+        term_obj = current_term()
+    if term_obj is None:
+        return JsonResponse({'success': False, 'error': 'Term not found'}, status=404)
+    
+    classes = Class.objects.filter(status='ACTIVE')
+    class_ids = [pk for pk in request.GET.get('class_ids', '').split(',') if pk]
+    if class_ids:
+        try:
+            classes = Class.objects.filter(id__in=[int(pk) for pk in class_ids])
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Invalid class ids'}, status=400)
+    names = dict(classes.order_by('name').values_list('id', 'name'))
+    
+    heatmap = class_heatmap(names, term_obj.start_date, term_obj.end_date)
+    return JsonResponse({
+        'success': True,
+        'term': term_obj.term,
+        'academic_year': term_obj.academic_year_id,
+        'start_date': term_obj.start_date.isoformat(),
+        'end_date': term_obj.end_date.isoformat(),
+        'classes': [
+            {'id': class_id, 'name': name, 'days': heatmap[class_id]}
+            for class_id, name in names.items()
+        ]
+    })
+
 @login_required
 def close_attendance_session(request, session_id):
     """API endpoint to close an attendance session"""
@@ -378,10 +418,7 @@ def close_attendance_session(request, session_id):
         if session.session_taken_by != request.user and request.user.role not in ['SUPER_ADMIN', 'ADMIN', 'PRINCIPAL']:
             return JsonResponse({'error': 'Unauthorized'}, status=403)
         
-        session.is_closed = True
-        session.closed_by = request.user
-        session.closed_at = timezone.now()
-        session.save()
+        close_session(session, request.user)
         
         return JsonResponse({'success': True})
     
@@ -20,7 +20,9 @@ from apps.accounts.models import User
 from apps.accounts.decorators import admin_required, parent_required
 from apps.students.models import Student
 from apps.academics.models import Score, ReportCard
+from apps.academics.timeline import student_timeline
 from apps.attendance.models import Attendance
+from apps.attendance.summaries import attendance_totals
 from apps.announcements.models import Notification, Event
 
 # Parent List Views
@@ -281,28 +283,12 @@ def child_scores(request, child_id):
         messages.error(request, "You don't have permission to view this child.")
         return redirect('parents:dashboard')
     
-    scores = Score.objects.filter(
-        student=child
-    ).select_related(
-        'subject_assessment__subject',
-        'subject_assessment__assessment'
-    ).order_by('-subject_assessment__academic_year', '-subject_assessment__term')
-    
-    # Group by term
-    terms = {}
-    for score in scores:
-        key = f"{score.subject_assessment.academic_year}_{score.subject_assessment.term}"
-        if key not in terms:
-            terms[key] = {
-                'academic_year': score.subject_assessment.academic_year,
-                'term': score.subject_assessment.term,
-                'scores': []
-            }
-        terms[key]['scores'].append(score)
+    # Term-by-term results, newest first
+    terms = student_timeline(child)[::-1]
     
     context = {
         'child': child,
-        'terms': terms.values(),
+        'terms': terms,
         'title': f"{child.user.get_full_name()}'s Scores"
     }
     return render(request, 'parents/dashboard/child_scores.html', context)
@@ -322,22 +308,17 @@ def child_attendance(request, child_id):
         student=child
     ).select_related('session').order_by('-session__date')
     
-    # Calculate statistics
-    total_days = attendance.count()
-    present_days = attendance.filter(status='P').count()
-    absent_days = attendance.filter(status='A').count()
-    late_days = attendance.filter(status='L').count()
-    
-    attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
+    # Statistics come from the attendance summaries plus any open sessions
+    totals = attendance_totals(child)
     
     context = {
         'child': child,
         'attendance': attendance,
-        'total_days': total_days,
-        'present_days': present_days,
-        'absent_days': absent_days,
-        'late_days': late_days,
-        'attendance_percentage': attendance_percentage,
+        'total_days': totals['total_days'],
+        'present_days': totals['present_days'],
+        'absent_days': totals['absent_days'],
+        'late_days': totals['late_days'],
+        'attendance_percentage': totals['attendance_percentage'],
         'title': f"{child.user.get_full_name()}'s Attendance"
     }
     return render(request, 'parents/dashboard/child_attendance.html', context)
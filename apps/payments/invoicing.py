@@ -0,0 +1,246 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import FeeCategory, FeeStructure, Invoice, InvoiceItem, Discount
+from apps.school.models import Term
+from apps.school.sequences import number_block
+from apps.students.models import Student
+
+
+CENT = Decimal('0.01')
+
+
+class FeeIndex:
+    """
+    Active fee structures of a term, indexed by what they apply to.
+
+    Class-specific structures are keyed by class, level-wide ones by class
+    level and the rest apply to every student. Within a fee category the
+    most specific structures win: a class-specific structure replaces the
+    level-wide and school-wide ones of its category, and a level-wide one
+    replaces the school-wide ones. The result is cached per class.
+    """
+
+    def __init__(self, structures):
+        self.by_class = defaultdict(list)
+        self.by_level = defaultdict(list)
+        self.everyone = []
+        self.resolved = {}
+        for structure in structures:
+            if structure.class_specific_id:
+                self.by_class[structure.class_specific_id].append(structure)
+            elif structure.class_level_id:
+                self.by_level[structure.class_level_id].append(structure)
+            else:
+                self.everyone.append(structure)
+
+    def fees_for(self, class_id, level_id):
+        key = (class_id, level_id)
+        if key not in self.resolved:
+            fees = []
+            covered = set()
+            for structures in (self.by_class.get(class_id, []),
+                               self.by_level.get(level_id, []),
+                               self.everyone):
+                fees += [fee for fee in structures if fee.category_id not in covered]
+                covered.update(fee.category_id for fee in structures)
+            self.resolved[key] = fees
+        return self.resolved[key]
+
+
+def term_months(term):
+    """Number of calendar months a term spans, used to bill monthly fees"""
+    start, end = term.start_date, term.end_date
+    return max((end.year - start.year) * 12 + end.month - start.month + 1, 1)
+
+
+def term_fee_structures(academic_year, term, optional_codes=()):
+    """
+    Active fee structures billed in a term.
+
+    Structures for the term itself are included, as are termly and monthly
+    structures without a term, which are billed every term. One-time and
+    yearly structures are only billed in the term they name. Fees of
+    optional categories are left out unless their category code is in
+    ``optional_codes``.
+    """
+    return FeeStructure.objects.filter(
+        Q(term=term) | Q(term__isnull=True, category__frequency__in=[
+            FeeCategory.Frequency.TERMLY, FeeCategory.Frequency.MONTHLY]),
+        Q(category__is_compulsory=True) | Q(category__code__in=optional_codes),
+        academic_year=academic_year,
+        is_active=True
+    ).select_related('category').order_by('category__name', 'name', 'id')
+
+
+def usable_discounts(codes, today):
+    """Discounts for the given codes that are valid today and not used up"""
+    discounts = list(Discount.objects.filter(
+        code__in=codes,
+        valid_from__lte=today,
+        valid_to__gte=today
+    ).prefetch_related('applicable_classes'))
+    return [
+        discount for discount in discounts
+        if discount.max_uses is None or discount.used_count < discount.max_uses
+    ]
+
+
+def fee_quantity(fee, months):
+    """Times a fee is billed in a term: once per month for monthly fees"""
+    return months if fee.category.frequency == FeeCategory.Frequency.MONTHLY else 1
+
+
+def build_invoice(student_id, fees, discount, academic_year, term, due_date, created_by,
+                  today, months):
+    """Unsaved invoice and items for a student, with totals computed"""
+    items = [
+        InvoiceItem(
+            fee_structure=fee,
+            quantity=fee_quantity(fee, months),
+            unit_price=fee.amount,
+            total_price=fee_quantity(fee, months) * fee.amount,
+            description=fee.name,
+        )
+        for fee in fees
+    ]
+    subtotal = sum((item.total_price for item in items), Decimal('0'))
+    discount_amount = Decimal('0')
+    if discount is not None:
+        discount_amount = (subtotal * discount.percentage / 100).quantize(CENT)
+    total = subtotal - discount_amount
+    invoice = Invoice(
+        student_id=student_id,
+        subtotal=subtotal,
+        discount=discount_amount,
+        total_amount=total,
+        amount_paid=0,
+        balance=total,
+        due_date=due_date or min(fee.due_date for fee in fees),
+        academic_year=academic_year,
+        term=term,
+        created_by=created_by,
+        notes=f"Discount: {discount.code}" if discount else '',
+    )
+    if total <= 0:
+        invoice.status = Invoice.Status.PAID
+    elif today > invoice.due_date:
+        invoice.status = Invoice.Status.OVERDUE
+    return invoice, items
+
+
+def generate_term_invoices(academic_year, term, created_by, due_date=None,
+                           discount_codes=(), optional_codes=(), dry_run=False,
+                           chunk_size=500):
+    """
+    Invoice every active student for a term's fees.
+
+    Applicable fee structures are resolved per student from an in-memory
+    index of the term's active structures. Optional fee categories are only
+    billed when their code is in ``optional_codes``, and then to every
+    student they apply to. Monthly fees are billed once for every calendar
+    month the term spans, as the item quantity. Students that already have
+    an invoice for the term, other than a cancelled one, are skipped. Each
+    discount code is given to the students it applies to, up to its
+    remaining uses, taking the largest applicable one.
+
+    Invoices and items are written with ``bulk_create`` in transactions of
+    ``chunk_size`` students, numbered from one block of the invoice
+    sequence per chunk. With ``dry_run`` nothing is written and only the
+    totals are computed.
+
+    Returns a dict of counts and totals.
+    """
+    today = timezone.localdate()
+    structures = list(term_fee_structures(academic_year, term, optional_codes))
+    months = 1
+    if any(fee.category.frequency == FeeCategory.Frequency.MONTHLY for fee in structures):
+        term_obj = Term.objects.filter(academic_year=academic_year, term=term).first()
+        if term_obj is None:
+            raise ValueError("Monthly fees need the term's dates; set up the term first.")
+        months = term_months(term_obj)
+    index = FeeIndex(structures)
+    discounts = sorted(usable_discounts(discount_codes, today),
+                       key=lambda discount: discount.percentage, reverse=True)
+    remaining = {
+        discount.id: None if discount.max_uses is None else discount.max_uses - discount.used_count
+        for discount in discounts
+    }
+    discount_classes = {
+        discount.id: {class_obj.id for class_obj in discount.applicable_classes.all()}
+        for discount in discounts
+    }
+
+    invoiced = set(Invoice.objects.filter(
+        academic_year=academic_year, term=term
+    ).exclude(status=Invoice.Status.CANCELLED).values_list('student_id', flat=True))
+    students = list(Student.objects.filter(
+        enrollment_status='ACTIVE', current_class__isnull=False
+    ).order_by('id').values_list('id', 'current_class_id', 'current_class__class_level_id'))
+
+    stats = {
+        'students': 0, 'invoices': 0, 'items': 0, 'already_invoiced': 0,
+        'no_fees': 0, 'discounted': 0, 'subtotal': Decimal('0'),
+        'discount': Decimal('0'), 'total': Decimal('0'),
+    }
+    pending = []
+
+    def write(pending):
+        used = defaultdict(int)
+        with transaction.atomic():
+            numbers = number_block(
+                'INV', 5, len(pending), existing=(Invoice.objects.all(), 'invoice_number'))
+            for (invoice, items, discount), number in zip(pending, numbers):
+                invoice.invoice_number = number
+                if discount is not None:
+                    used[discount.id] += 1
+            Invoice.objects.bulk_create([invoice for invoice, _, _ in pending])
+            for invoice, items, _ in pending:
+                for item in items:
+                    item.invoice = invoice
+            InvoiceItem.objects.bulk_create(
+                [item for _, items, _ in pending for item in items], batch_size=1000)
+            for discount_id, count in used.items():
+                Discount.objects.filter(pk=discount_id).update(used_count=F('used_count') + count)
+
+    for student_id, class_id, level_id in students:
+        stats['students'] += 1
+        if student_id in invoiced:
+            stats['already_invoiced'] += 1
+            continue
+        fees = index.fees_for(class_id, level_id)
+        if not fees:
+            stats['no_fees'] += 1
+            continue
+
+        discount = next((
+            discount for discount in discounts
+            if remaining[discount.id] != 0 and (
+                discount.applicable_to_all or class_id in discount_classes[discount.id])
+        ), None)
+        if discount is not None and remaining[discount.id] is not None:
+            remaining[discount.id] -= 1
+
+        invoice, items = build_invoice(
+            student_id, fees, discount, academic_year, term, due_date, created_by,
+            today, months)
+        stats['invoices'] += 1
+        stats['items'] += len(items)
+        stats['discounted'] += discount is not None
+        stats['subtotal'] += invoice.subtotal
+        stats['discount'] += invoice.discount
+        stats['total'] += invoice.total_amount
+
+        if not dry_run:
+            pending.append((invoice, items, discount))
+            if len(pending) >= chunk_size:
+                write(pending)
+                pending = []
+
+    if pending:
+        write(pending)
+    return stats
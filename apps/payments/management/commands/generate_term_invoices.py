@@ -0,0 +1,93 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import User
+from apps.payments.invoicing import generate_term_invoices
+from apps.school.models import AcademicYear, SchoolProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Invoice every active student for a term's active fee structures. "
+        "Students already invoiced for the term are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--term', required=True, choices=SchoolProfile.TermChoices.values,
+            help="Term to invoice")
+        parser.add_argument(
+            '--academic-year', type=int,
+            help="Academic year (id); defaults to the current academic year")
+        parser.add_argument(
+            '--due-date', type=datetime.date.fromisoformat,
+            help="Due date for every invoice (YYYY-MM-DD); defaults to the "
+                 "earliest due date of the invoice's fees")
+        parser.add_argument(
+            '--discount', action='append', default=[], metavar='CODE',
+            help="Discount code to apply where it is valid; may be repeated")
+        parser.add_argument(
+            '--optional', action='append', default=[], metavar='CODE',
+            help="Code of an optional fee category to bill as well; it is billed to "
+                 "every student its fee structures apply to, not per student. "
+                 "May be repeated")
+        parser.add_argument(
+            '--created-by',
+            help="Username recorded on the invoices; defaults to the first superuser")
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help="Number of invoices written per transaction")
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only preview the totals without creating invoices")
+
+    def handle(self, *args, **options):
+        if options['academic_year']:
+            academic_year = AcademicYear.objects.filter(pk=options['academic_year']).first()
+        else:
+            academic_year = AcademicYear.objects.filter(is_current=True).first()
+        if academic_year is None:
+            raise CommandError("Academic year not found.")
+
+        if options['created_by']:
+            user = User.objects.filter(username=options['created_by']).first()
+        else:
+            user = User.objects.filter(is_superuser=True, is_active=True).order_by('id').first()
+        if user is None:
+            raise CommandError("No user to record as the creator of the invoices.")
+
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        start = time.perf_counter()
+        try:
+            stats = generate_term_invoices(
+                academic_year, options['term'], user,
+                due_date=options['due_date'],
+                discount_codes=options['discount'],
+                optional_codes=options['optional'],
+                dry_run=options['dry_run'],
+                chunk_size=options['chunk_size'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{stats['students']} active students: {stats['already_invoiced']} already invoiced, "
+            f"{stats['no_fees']} without applicable fees, {stats['discounted']} discounted."
+        )
+        self.stdout.write(
+            f"Subtotal ₦{stats['subtotal']:,.2f}, discounts ₦{stats['discount']:,.2f}, "
+            f"total ₦{stats['total']:,.2f}."
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f"Dry run: {stats['invoices']} invoices with {stats['items']} items "
+                f"would be created."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Created {stats['invoices']} invoices with {stats['items']} items "
+                f"in {elapsed:.2f}s."))
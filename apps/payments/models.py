@@ -4,6 +4,7 @@ from apps.accounts.models import User
 from apps.students.models import Student
 from apps.classes.models import Class, ClassLevel
 from apps.school.models import AcademicYear, SchoolProfile
+from apps.school.sequences import next_number
 import uuid
 from django.utils import timezone
 
@@ -141,18 +142,8 @@ class Invoice(models.Model):
     def save(self, *args, **kwargs):
         if not self.invoice_number:
             # Generate invoice number (e.g., INV202400001)
-            year = timezone.now().year
-            last_invoice = Invoice.objects.filter(
-                invoice_number__startswith=f"INV{year}"
-            ).order_by('invoice_number').last()
-
-            if last_invoice:
-                last_number = int(last_invoice.invoice_number[-5:])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-
-            self.invoice_number = f"INV{year}{new_number:05d}"
+            self.invoice_number = next_number(
+                'INV', 5, existing=(Invoice.objects.all(), 'invoice_number'))
 
         self.balance = self.total_amount - self.amount_paid
 
@@ -268,8 +259,8 @@ class PaymentReceipt(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.receipt_number:
-            self.receipt_number = f"RCPT{
-                timezone.now().strftime('%Y%m%d%H%M%S')}"
+            # Generate receipt number (e.g., RCPT2024000001)
+            self.receipt_number = next_number('RCPT', 6)
         super().save(*args, **kwargs)
 
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import SchoolProfile, AcademicYear, Term, Holiday
+from .models import SchoolProfile, AcademicYear, Term, Holiday, NumberSequence
 
 
 @admin.register(SchoolProfile)
@@ -29,3 +29,10 @@ class TermAdmin(admin.ModelAdmin):
 class HolidayAdmin(admin.ModelAdmin):
     list_display = ('name', 'start_date', 'end_date')
     search_fields = ('name',)
+
+
+@admin.register(NumberSequence)
+class NumberSequenceAdmin(admin.ModelAdmin):
+    list_display = ('prefix', 'year', 'last_value', 'updated_at')
+    list_filter = ('prefix',)
+    readonly_fields = ('updated_at',)
@@ -124,3 +124,18 @@ class Holiday(models.Model):
 
     def __str__(self):
         return f"{self.name} ({self.start_date} - {self.end_date})"
+
+
+class NumberSequence(models.Model):
+    """Counter behind generated document numbers, one row per prefix and year"""
+    prefix = models.CharField(max_length=10)
+    year = models.PositiveIntegerField()
+    last_value = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['prefix', 'year']
+        ordering = ['prefix', '-year']
+
+    def __str__(self):
+        return f"{self.prefix}{self.year} - {self.last_value}"
@@ -0,0 +1,79 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import NumberSequence
+
+
+def format_number(prefix, year, value, width):
+    return f"{prefix}{year}{value:0{width}d}"
+
+
+def highest_number(queryset, field, prefix, year):
+    """
+    Highest number already issued under a prefix and year.
+
+    Only read once per prefix and year, when the sequence row is created, so
+    numbers issued before the sequence existed are never handed out again.
+    """
+    start = f"{prefix}{year}"
+    values = queryset.filter(**{f"{field}__startswith": start}).values_list(field, flat=True)
+    highest = 0
+    for value in values.iterator():
+        suffix = value[len(start):]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest
+
+
+def allocate_numbers(prefix, count=1, year=None, existing=None):
+    """
+    Reserve ``count`` consecutive values of the (prefix, year) sequence.
+
+    The counter row is bumped with a single ``UPDATE ... SET last_value =
+    last_value + count`` whose row lock is held until the surrounding
+    transaction ends, so concurrent callers always get disjoint blocks. The
+    row is created on first use; ``existing`` is an optional (queryset,
+    field) pair holding numbers issued before the sequence, which it then
+    starts after.
+
+    Returns the range of reserved values.
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1.")
+    year = year or timezone.now().year
+    sequence = NumberSequence.objects.filter(prefix=prefix, year=year)
+
+    with transaction.atomic():
+        if not sequence.update(last_value=F('last_value') + count, updated_at=timezone.now()):
+            try:
+                with transaction.atomic():
+                    start = highest_number(*existing, prefix, year) if existing else 0
+                    NumberSequence.objects.create(
+                        prefix=prefix, year=year, last_value=start + count)
+            except IntegrityError:
+                # Created by a concurrent caller in the meantime
+                sequence.update(last_value=F('last_value') + count, updated_at=timezone.now())
+        last_value = sequence.values_list('last_value', flat=True).get()
+    return range(last_value - count + 1, last_value + 1)
+
+
+def next_number(prefix, width, year=None, existing=None):
+    """Next formatted number of a sequence, e.g. ``INV202500001``"""
+    year = year or timezone.now().year
+    value, = allocate_numbers(prefix, year=year, existing=existing)
+    return format_number(prefix, year, value, width)
+
+
+def number_block(prefix, width, count, year=None, existing=None):
+    """
+    Reserve a block of formatted numbers for bulk inserts.
+
+    One counter update covers the whole block, so each number costs O(1)
+    whatever the block size.
+    """
+    year = year or timezone.now().year
+    return [
+        format_number(prefix, year, value, width)
+        for value in allocate_numbers(prefix, count, year=year, existing=existing)
+    ]
@@ -2,7 +2,7 @@ from django.db import models
 from apps.accounts.models import User
 from apps.classes.models import Class
 from apps.school.models import AcademicYear
-from django.utils import timezone
+from apps.school.sequences import next_number
 
 
 class Student(models.Model):
@@ -85,18 +85,8 @@ class Student(models.Model):
     def save(self, *args, **kwargs):
         if not self.admission_number:
             # Generate admission number (e.g., STU2024001)
-            year = timezone.now().year
-            last_student = Student.objects.filter(
-                admission_number__startswith=f"STU{year}"
-            ).order_by('admission_number').last()
-
-            if last_student:
-                last_number = int(last_student.admission_number[-3:])
-                new_number = last_number + 1
-            else:
-                new_number = 1
-
-            self.admission_number = f"STU{year}{new_number:03d}"
+            self.admission_number = next_number(
+                'STU', 3, existing=(Student.objects.all(), 'admission_number'))
 
         super().save(*args, **kwargs)
 
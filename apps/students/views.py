@@ -21,8 +21,11 @@ from apps.accounts.models import User
 from apps.accounts.decorators import admin_required, teacher_required, principal_required
 from apps.classes.models import Class
 from apps.school.models import AcademicYear
+from apps.school.sequences import number_block
 from apps.academics.models import Score, ReportCard
+from apps.academics.timeline import student_timeline
 from apps.attendance.models import Attendance
+from apps.attendance.summaries import attendance_totals
 
 # Student List Views
 @method_decorator([login_required, principal_required], name='dispatch')
@@ -256,11 +259,18 @@ def bulk_student_upload(request):
             
             # Skip header row
             next(reader, None)
+            rows = list(reader)
+
+            # Reserve admission numbers for rows without one in a single block
+            missing = sum(1 for row in rows if len(row) > 3 and not row[3].strip())
+            admission_numbers = iter(number_block(
+                'STU', 3, missing, existing=(Student.objects.all(), 'admission_number')
+            ) if missing else [])
             
             created_count = 0
             error_count = 0
             
-            for row in reader:
+            for row in rows:
                 try:
                     # Create user
                     user = User.objects.create_user(
@@ -275,7 +285,7 @@ def bulk_student_upload(request):
                     # Create student
                     student = Student.objects.create(
                         user=user,
-                        admission_number=row[3],
+                        admission_number=row[3].strip() or next(admission_numbers),
                         date_of_birth=row[4],
                         gender=row[5],
                         address=row[6],
@@ -347,27 +357,11 @@ def student_scores(request):
     """View all scores for student"""
     student = request.user.student_profile
     
-    scores = Score.objects.filter(
-        student=student
-    ).select_related(
-        'subject_assessment__subject',
-        'subject_assessment__assessment'
-    ).order_by('-subject_assessment__academic_year', '-subject_assessment__term')
-    
-    # Group by term
-    terms = {}
-    for score in scores:
-        key = f"{score.subject_assessment.academic_year}_{score.subject_assessment.term}"
-        if key not in terms:
-            terms[key] = {
-                'academic_year': score.subject_assessment.academic_year,
-                'term': score.subject_assessment.term,
-                'scores': []
-            }
-        terms[key]['scores'].append(score)
+    # Term-by-term results, newest first
+    terms = student_timeline(student)[::-1]
     
     context = {
-        'terms': terms.values(),
+        'terms': terms,
         'title': 'My Scores'
     }
     return render(request, 'students/dashboard/scores.html', context)
@@ -381,21 +375,16 @@ def student_attendance(request):
         student=student
     ).select_related('session').order_by('-session__date')
     
-    # Calculate statistics
-    total_days = attendance.count()
-    present_days = attendance.filter(status='P').count()
-    absent_days = attendance.filter(status='A').count()
-    late_days = attendance.filter(status='L').count()
-    
-    attendance_percentage = (present_days / total_days * 100) if total_days > 0 else 0
+    # Statistics come from the attendance summaries plus any open sessions
+    totals = attendance_totals(student)
     
     context = {
         'attendance': attendance,
-        'total_days': total_days,
-        'present_days': present_days,
-        'absent_days': absent_days,
-        'late_days': late_days,
-        'attendance_percentage': attendance_percentage,
+        'total_days': totals['total_days'],
+        'present_days': totals['present_days'],
+        'absent_days': totals['absent_days'],
+        'late_days': totals['late_days'],
+        'attendance_percentage': totals['attendance_percentage'],
         'title': 'My Attendance'
     }
     return render(request, 'students/dashboard/attendance.html', context)